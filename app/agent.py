@@ -8,23 +8,27 @@ Combines:
 
 Async bridge: Streamlit runs inside a Tornado event loop. nest_asyncio
 patches it to allow asyncio.run() calls from synchronous Streamlit callbacks.
+
+LangChain, LangGraph, the MCP adapters and the OCI SDK are imported inside
+the functions that need them, so importing this module is cheap and each
+piece loads on the bootstrap thread that uses it (see bootstrap.py).
 """
 
 import asyncio
+from typing import TYPE_CHECKING
+
 import nest_asyncio
 
 # Patch the running event loop BEFORE any async operations.
 # Must be at module import time — before Streamlit's Tornado loop interferes.
 nest_asyncio.apply()
 
-from langchain_mcp_adapters.client import MultiServerMCPClient
-from langgraph.prebuilt import create_react_agent
-from langchain_core.messages import HumanMessage, AIMessage
-
-from oci_llm import build_llm
-from rag.retriever import build_rag_tool
+from scheduler import mcp_limiter
 from config import MCP_SERVER_URL, MAX_CHAT_HISTORY
 
+if TYPE_CHECKING:
+    from langchain_core.tools import StructuredTool
+
 
 SYSTEM_PROMPT = """You are an expert VMware vCenter administrator assistant for the operations team.
 
@@ -36,56 +40,87 @@ You have access to two categories of tools:
    - list_datastores, list_networks
    - list_vm_snapshots, create_vm_snapshot
    - get_inventory_summary, get_alarms
+   - search_inventory — fuzzy lookup of VM/host/datastore/network names, IPs, annotations
+   - get_dependents, get_blast_radius — what uses / what breaks if a datastore, portgroup,
+     host, switch or cluster goes down
+   - rightsizing_report — over- / under-provisioned VMs with reclaimable vCPU and GB
 
 2. RUNBOOK SEARCH tool (search_runbooks) — search operational runbooks, DR procedures,
    troubleshooting guides, SLAs, and documentation.
 
 Decision guide:
   - Current state queries (power status, resource usage, alarms) → vCenter tools
+  - Impact questions ("what breaks if datastore X fails") → get_blast_radius
+  - Capacity questions ("which VMs are oversized", "how much can we reclaim") → rightsizing_report
   - Procedure / how-to / policy questions → search_runbooks
   - Combined questions ("what's the DR procedure AND current state of cluster X") → use both
 
 Always:
   - Confirm vm_name precisely before any destructive action (power off / restart)
+  - If a name is not found, use the did_you_mean list or search_inventory rather than guessing
+  - List tools return {"stale", "as_of", "items"}; when stale is true, say the data is as of as_of
   - Cite the runbook source when answering from documentation
   - Be concise and direct — this is an ops team, not end users"""
 
 
 # ── MCP tool retrieval ─────────────────────────────────────────────────────────
 
-async def _get_mcp_tools() -> list:
+async def _get_mcp_tools(url: str = MCP_SERVER_URL) -> list:
     """
     Connect to mcp_server via SSE, retrieve all tool schemas, and return them
     as LangChain tools. Called once at agent build time.
     """
+    from langchain_mcp_adapters.client import MultiServerMCPClient
+
     client = MultiServerMCPClient({
         "vcenter": {
             "transport": "sse",
-            "url": MCP_SERVER_URL,
+            "url": url,
         }
     })
     return await client.get_tools()
 
 
-def get_mcp_tools() -> list:
+def get_mcp_tools(url: str = MCP_SERVER_URL) -> list:
     """Synchronous wrapper for use in Streamlit's synchronous context."""
-    return asyncio.run(_get_mcp_tools())
+    return asyncio.run(_get_mcp_tools(url))
+
+
+def _limit_mcp_tool(tool: "StructuredTool") -> "StructuredTool":
+    """
+    Copy an MCP tool so its calls count against the global MCP limit.
+    Only the coroutine changes — name, schema, response format, tags,
+    callbacks and the rest of the adapter's fields carry over.
+    """
+    inner = tool.coroutine
+
+    async def call(**kwargs):
+        async with mcp_limiter:
+            return await inner(**kwargs)
+
+    return tool.model_copy(update={"coroutine": call})
 
 
 # ── Agent construction ─────────────────────────────────────────────────────────
 
-def build_agent(mcp_tools: list):
+def build_agent(mcp_tools: list, llm=None, rag_tool=None):
     """
     Build and return a LangGraph ReAct agent.
 
     Args:
         mcp_tools: LangChain tools retrieved from the MCP server
+        llm:       Chat model override (defaults to OCI GenAI — see build_llm)
+        rag_tool:  search_runbooks override (defaults to the PGVector tool)
     Returns:
         Compiled LangGraph agent (CompiledGraph)
     """
-    llm      = build_llm()
-    rag_tool = build_rag_tool()
-    all_tools = mcp_tools + [rag_tool]
+    from langgraph.prebuilt import create_react_agent
+    from oci_llm import build_llm, ThrottledChatModel
+    from rag.retriever import build_rag_tool
+
+    llm      = ThrottledChatModel(inner=llm or build_llm())
+    rag_tool = rag_tool or build_rag_tool()
+    all_tools = [_limit_mcp_tool(t) for t in mcp_tools] + [rag_tool]
 
     return create_react_agent(
         model=llm,
@@ -107,6 +142,8 @@ async def _invoke_agent(agent, message: str, history: list[tuple[str, str]]) ->
     Returns:
         Agent's response string
     """
+    from langchain_core.messages import HumanMessage, AIMessage
+
     messages = []
     for role, content in history[-(MAX_CHAT_HISTORY):]:
         if role == "user":
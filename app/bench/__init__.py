@@ -0,0 +1,8 @@
+"""
+Offline benchmark and load-test harnesses for the app container.
+
+Everything under bench/ runs without OCI GenAI or a live vCenter — see
+bench/fakes.py for the stand-ins. Run modules from the app/ directory:
+
+  python -m bench.loadtest --help
+"""
@@ -0,0 +1,364 @@
+"""
+Offline stand-ins for OCI GenAI and the vCenter MCP server.
+
+  - ScriptedChatModel  — replays recorded tool calls and answers, with latency
+  - HashingEmbeddings  — deterministic bag-of-words vectors, no network
+  - start_stub_mcp_server — FastMCP SSE server exposing the same tool names
+                            as mcp_server/server.py over canned inventory
+
+These let build_agent / invoke_agent run end-to-end inside one process, so
+what gets measured is the app container itself (LangGraph, MCP client,
+event loop), not OCI or vCenter.
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import socket
+import threading
+import time
+import uuid
+from typing import Any
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import Field
+
+
+def _delay_seconds(latency_ms: float, jitter_ms: float) -> float:
+    return max(0.0, latency_ms + random.uniform(-jitter_ms, jitter_ms)) / 1000
+
+
+# ── Chat model ─────────────────────────────────────────────────────────────────
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    Fake tool-calling chat model driven by a recorded script.
+
+    script maps a user message to {"tool_calls": [{"name", "args"}, ...],
+    "answer": str}. Each model step after that user message emits the next
+    tool call (one per ReAct loop, like Command A does); once the calls are
+    exhausted it emits the answer. Unknown messages get a plain answer.
+    """
+
+    script:     dict[str, dict] = Field(default_factory=dict)
+    latency_ms: float = 0.0
+    jitter_ms:  float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-fake"
+
+    def bind_tools(self, tools, **kwargs):
+        # Tool schemas are irrelevant — the script already names the tools
+        return self
+
+    def _next_message(self, messages: list[BaseMessage]) -> AIMessage:
+        human_idx = [i for i, m in enumerate(messages) if isinstance(m, HumanMessage)]
+        if not human_idx:
+            return AIMessage(content="Done.")
+        last  = human_idx[-1]
+        step  = sum(1 for m in messages[last + 1:] if isinstance(m, AIMessage))
+        turn  = self.script.get(messages[last].content, {})
+        calls = turn.get("tool_calls", [])
+
+        if step < len(calls):
+            call = calls[step]
+            return AIMessage(
+                content="",
+                tool_calls=[{
+                    "name": call["name"],
+                    "args": call.get("args", {}),
+                    "id":   f"call_{uuid.uuid4().hex[:12]}",
+                }],
+            )
+        return AIMessage(content=turn.get("answer", "Done."))
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(_delay_seconds(self.latency_ms, self.jitter_ms))
+        return ChatResult(generations=[ChatGeneration(message=self._next_message(messages))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(_delay_seconds(self.latency_ms, self.jitter_ms))
+        return ChatResult(generations=[ChatGeneration(message=self._next_message(messages))])
+
+
+def build_script(conversations: list[dict]) -> dict[str, dict]:
+    """Flatten recorded conversations into the user-message → turn map."""
+    return {
+        turn["user"]: turn
+        for conv in conversations
+        for turn in conv["turns"]
+    }
+
+
+# ── Embeddings ─────────────────────────────────────────────────────────────────
+
+class HashingEmbeddings(Embeddings):
+    """
+    Deterministic feature-hashing embeddings.
+
+    Each lowercase alphanumeric token is hashed to a signed bucket and the
+    vector is L2-normalised, so texts sharing tokens have high cosine
+    similarity. Not semantic, but stable across runs and machines.
+    """
+
+    def __init__(self, dimensions: int = 1024, latency_ms: float = 0.0):
+        self.dimensions = dimensions
+        self.latency_ms = latency_ms
+
+    def _embed(self, text: str) -> list[float]:
+        vec = [0.0] * self.dimensions
+        for token in re.findall(r"[a-z0-9]+", text.lower()):
+            h = int.from_bytes(hashlib.md5(token.encode()).digest()[:8], "big")
+            vec[h % self.dimensions] += 1.0 if (h >> 63) else -1.0
+        norm = math.sqrt(sum(v * v for v in vec))
+        if norm == 0:
+            vec[0] = 1.0
+            return vec
+        return [v / norm for v in vec]
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        time.sleep(self.latency_ms / 1000)
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        time.sleep(self.latency_ms / 1000)
+        return self._embed(text)
+
+
+# ── Stub MCP server ────────────────────────────────────────────────────────────
+
+def _fake_inventory(num_vms: int, num_hosts: int) -> dict[str, list[dict]]:
+    rng   = random.Random(42)
+    hosts = [
+        {
+            "name":             f"esxi-{i:02d}.lab.local",
+            "connection_state": "connected",
+            "power_state":      "poweredOn",
+            "cpu_cores":        32,
+            "memory_gb":        512.0,
+            "model":            "PowerEdge R750",
+            "vendor":           "Dell Inc.",
+            "version":          "8.0.2",
+        }
+        for i in range(num_hosts)
+    ]
+    vms = [
+        {
+            "name":        f"app-vm-{i:04d}",
+            "power_state": "poweredOn" if rng.random() > 0.1 else "poweredOff",
+            "num_cpu":     rng.choice([2, 4, 8]),
+            "memory_mb":   rng.choice([4096, 8192, 16384]),
+            "guest_os":    "Ubuntu Linux (64-bit)",
+            "ip_address":  f"10.0.{i // 250}.{i % 250 + 2}",
+            "host":        hosts[i % num_hosts]["name"],
+        }
+        for i in range(num_vms)
+    ]
+    datastores = [
+        {"name": f"vsanDatastore-{i}", "type": "vsan", "capacity_gb": 20480.0,
+         "free_gb": 8192.0, "used_gb": 12288.0, "accessible": True}
+        for i in range(2)
+    ]
+    networks = [
+        {"name": name, "accessible": True}
+        for name in ("VM Network", "pg-app", "pg-db", "pg-mgmt")
+    ]
+    return {"vms": vms, "hosts": hosts, "datastores": datastores, "networks": networks}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_stub_mcp_server(
+    latency_ms: float = 0.0,
+    jitter_ms:  float = 0.0,
+    num_vms:    int = 500,
+    num_hosts:  int = 8,
+    port:       int | None = None,
+) -> str:
+    """
+    Start a stub vCenter MCP server on a daemon thread and return its SSE URL.
+
+    Tool names and argument signatures mirror mcp_server/server.py so the
+    agent's tool schemas (and the LLM-facing descriptions) look the same.
+    """
+    import uvicorn
+    from mcp.server.fastmcp import FastMCP
+
+    port = port or _free_port()
+    inv  = _fake_inventory(num_vms, num_hosts)
+    by_name = {vm["name"].lower(): vm for vm in inv["vms"]}
+    mcp  = FastMCP("vCenter MCP Stub", host="127.0.0.1", port=port)
+
+    async def _respond(payload: Any) -> str:
+        await asyncio.sleep(_delay_seconds(latency_ms, jitter_ms))
+        return json.dumps(payload, indent=2)
+
+    def _listed(items: list) -> dict:
+        # Same shape as the real list tools
+        return {"stale": False, "as_of": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), "items": items}
+
+    def _vm_or_error(vm_name: str) -> dict:
+        return by_name.get(vm_name.lower()) or {"error": f"VM '{vm_name}' not found"}
+
+    @mcp.tool()
+    async def list_vms() -> str:
+        """List all virtual machines with their power state, CPU, memory, and IP."""
+        return await _respond(_listed(inv["vms"]))
+
+    @mcp.tool()
+    async def get_vm_details(vm_name: str) -> str:
+        """Get detailed information about a specific VM by name."""
+        return await _respond(_vm_or_error(vm_name))
+
+    @mcp.tool()
+    async def power_on_vm(vm_name: str) -> str:
+        """Power on a virtual machine by name."""
+        vm = _vm_or_error(vm_name)
+        return await _respond(vm if "error" in vm else {"status": "power on task started", "vm": vm_name})
+
+    @mcp.tool()
+    async def power_off_vm(vm_name: str, confirm: bool = False) -> str:
+        """Power off a virtual machine by name. Requires confirm=True."""
+        if not confirm:
+            return await _respond({"error": "Set confirm=True to power off the VM."})
+        return await _respond({"status": "power off task started", "vm": vm_name})
+
+    @mcp.tool()
+    async def restart_vm(vm_name: str, confirm: bool = False) -> str:
+        """Restart a virtual machine by name. Requires confirm=True."""
+        if not confirm:
+            return await _respond({"error": "Set confirm=True to restart the VM."})
+        return await _respond({"status": "restart task started", "vm": vm_name})
+
+    @mcp.tool()
+    async def list_hosts() -> str:
+        """List all ESXi hosts with connection state, CPU cores, and memory."""
+        return await _respond(_listed(inv["hosts"]))
+
+    @mcp.tool()
+    async def get_host_performance(host_name: str) -> str:
+        """Get CPU and memory utilisation for a specific ESXi host."""
+        return await _respond({
+            "name": host_name, "cpu_usage_mhz": 41000, "cpu_total_mhz": 96000,
+            "memory_usage_mb": 300000, "memory_total_mb": 524288,
+        })
+
+    @mcp.tool()
+    async def list_datastores() -> str:
+        """List all datastores with capacity, free space, and accessibility."""
+        return await _respond(_listed(inv["datastores"]))
+
+    @mcp.tool()
+    async def list_networks() -> str:
+        """List all networks and port groups in the vCenter inventory."""
+        return await _respond(_listed(inv["networks"]))
+
+    @mcp.tool()
+    async def list_vm_snapshots(vm_name: str) -> str:
+        """List all snapshots for a specific VM."""
+        return await _respond([{"name": "pre-patch", "description": "", "created": "2026-01-01 00:00:00"}])
+
+    @mcp.tool()
+    async def create_vm_snapshot(vm_name: str, snapshot_name: str, description: str = "") -> str:
+        """Create a snapshot of a VM."""
+        return await _respond({"status": "snapshot task started", "vm": vm_name, "snapshot": snapshot_name})
+
+    @mcp.tool()
+    async def get_inventory_summary() -> str:
+        """Return a high-level count of VMs, hosts, and datastores in the environment."""
+        on = sum(1 for vm in inv["vms"] if vm["power_state"] == "poweredOn")
+        return await _respond({
+            "total_vms": len(inv["vms"]), "powered_on_vms": on,
+            "powered_off_vms": len(inv["vms"]) - on,
+            "total_hosts": len(inv["hosts"]), "total_datastores": len(inv["datastores"]),
+        })
+
+    @mcp.tool()
+    async def search_inventory(query: str, types: str = "", limit: int = 10) -> str:
+        """Fuzzy search over VM, host, datastore and network names, hostnames, IPs and annotations."""
+        needle  = "".join(ch for ch in query.lower() if ch.isalnum())
+        results = [
+            {"type": kind, "name": obj["name"], "score": 1.0}
+            for kind, key in (("vm", "vms"), ("host", "hosts"), ("datastore", "datastores"), ("network", "networks"))
+            if not types or kind in types
+            for obj in inv[key]
+            if needle and needle in "".join(ch for ch in obj["name"].lower() if ch.isalnum())
+        ]
+        return await _respond({"query": query, "results": results[:limit]})
+
+    @mcp.tool()
+    async def get_dependents(entity: str, entity_type: str = "", limit: int = 200) -> str:
+        """Show what directly uses an entity and what the entity itself depends on."""
+        vms = [vm for vm in inv["vms"] if vm["host"] == entity][:limit]
+        return await _respond({
+            "entity": {"type": entity_type or "host", "name": entity},
+            "counts": {"vm": len(vms)},
+            "used_by": {"vm": [{"type": "vm", "name": vm["name"], "edge": "hard"} for vm in vms]},
+            "depends_on": [],
+        })
+
+    @mcp.tool()
+    async def get_blast_radius(entity: str, entity_type: str = "", limit: int = 200) -> str:
+        """Estimate what breaks if an entity goes down."""
+        vms = [vm for vm in inv["vms"] if vm["host"] == entity]
+        return await _respond({
+            "entity": {"type": entity_type or "host", "name": entity},
+            "summary": {"impacted": {"vm": len(vms)}, "degraded": {},
+                        "powered_on_vms": sum(1 for vm in vms if vm["power_state"] == "poweredOn")},
+            "impacted": {"vm": [{"type": "vm", "name": vm["name"], "depth": 1} for vm in vms[:limit]]},
+            "degraded": {},
+        })
+
+    @mcp.tool()
+    async def rightsizing_report(history_days: int = 0, action: str = "", page: int = 1,
+                                 page_size: int = 25) -> str:
+        """Fleet-wide VM rightsizing recommendations, ranked, with reclaimable vCPU and GB."""
+        items = [
+            {"name": vm["name"], "action": "downsize", "vcpu": vm["num_cpu"],
+             "target_vcpu": vm["num_cpu"] // 2, "memory_gb": vm["memory_mb"] / 1024,
+             "target_memory_gb": vm["memory_mb"] // 2048,
+             "reclaimable_vcpu": vm["num_cpu"] - vm["num_cpu"] // 2,
+             "reclaimable_gb": vm["memory_mb"] // 2048}
+            for vm in inv["vms"] if vm["power_state"] == "poweredOn" and vm["num_cpu"] >= 8
+        ]
+        start = (max(1, page) - 1) * page_size
+        return await _respond({
+            "source": "quickStats snapshot",
+            "fleet": {"vms_analysed": len(inv["vms"]),
+                      "reclaimable_vcpu": sum(i["reclaimable_vcpu"] for i in items),
+                      "reclaimable_gb": sum(i["reclaimable_gb"] for i in items)},
+            "page": max(1, page), "total_items": len(items),
+            "items": items[start:start + page_size],
+        })
+
+    @mcp.tool()
+    async def get_alarms() -> str:
+        """Return any triggered alarms in the vCenter environment."""
+        return await _respond([{
+            "entity": inv["hosts"][0]["name"], "alarm": "Host memory usage",
+            "status": "yellow", "acknowledged": False,
+        }])
+
+    server = uvicorn.Server(uvicorn.Config(
+        mcp.sse_app(), host="127.0.0.1", port=port, log_level="warning",
+    ))
+    threading.Thread(target=server.run, name="stub-mcp", daemon=True).start()
+
+    deadline = time.monotonic() + 10
+    while not server.started:
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"Stub MCP server did not start on port {port}")
+        time.sleep(0.05)
+
+    return f"http://127.0.0.1:{port}/sse"
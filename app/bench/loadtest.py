@@ -0,0 +1,278 @@
+"""
+Offline load test for the agent container.
+
+Replays recorded conversations through build_agent / invoke_agent at one or
+more concurrency levels, with every external dependency replaced by the
+stand-ins in bench/fakes.py:
+
+  - LLM         → ScriptedChatModel (recorded tool calls + latency)
+  - MCP server  → stub FastMCP SSE server on localhost
+  - Embeddings  → HashingEmbeddings over an in-memory runbook store
+
+Reports throughput, p50/p95/p99 turn latency, event-loop lag and RSS per
+concurrent session for each level, and flags the level where throughput
+stops scaling — the saturation point of one app container.
+
+Modes:
+  threads — each session on its own thread calling invoke_agent(), which is
+            how Streamlit script threads drive the agent today (default)
+  async   — all sessions as tasks on one event loop calling _invoke_agent()
+
+Usage (from app/):
+  python -m bench.loadtest --concurrency 1,5,10,20,40 --sessions 80
+  python -m bench.loadtest --llm-latency-ms 1200 --tool-latency-ms 300 --json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# config.py fails fast without these — the harness never talks to OCI
+os.environ.setdefault("COMPARTMENT_ID", "ocid1.compartment.oc1..offline-bench")
+os.environ.setdefault("OCI_AUTH_TYPE", "api_key")
+
+from langchain_core.documents import Document
+from langchain_core.vectorstores import InMemoryVectorStore
+
+from agent import get_mcp_tools, build_agent, invoke_agent, _invoke_agent
+from rag.retriever import build_rag_tool
+from bench.metrics import percentile
+from bench.fakes import (
+    ScriptedChatModel,
+    HashingEmbeddings,
+    build_script,
+    start_stub_mcp_server,
+)
+
+DEFAULT_CONVERSATIONS = Path(__file__).with_name("conversations.json")
+
+SAMPLE_RUNBOOKS = [
+    ("capacity.md", "Host memory pressure procedure: check ballooning and swapping, "
+                    "then vMotion the top memory consumers to a less loaded host."),
+    ("dr.md",       "DR failover procedure: declare the incident, freeze changes, "
+                    "fail over replication groups, re-IP, validate applications."),
+    ("patching.md", "Before patching ESXi hosts take a pre-patch snapshot of critical VMs "
+                    "and enter maintenance mode one host at a time."),
+    ("network.md",  "If a port group is inaccessible, verify the distributed switch uplinks "
+                    "and the VLAN trunk on the physical switch."),
+]
+
+
+# ── Measurement helpers ────────────────────────────────────────────────────────
+
+def rss_mb() -> float:
+    """Current resident set size in MB (Linux /proc, else peak RSS)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class LagMonitor:
+    """
+    Samples event-loop lag (how late a sleep(interval) wakes up) and RSS.
+
+    In async mode it runs on the same loop as the sessions. In threads mode
+    it runs on its own loop in a thread, where lag reflects GIL contention
+    from the session threads — the same starvation Streamlit's Tornado loop
+    sees in production.
+    """
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.lags_ms: list[float] = []
+        self.peak_rss = 0.0
+        self._stop = False
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while not self._stop:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lags_ms.append(max(0.0, (loop.time() - start - self.interval) * 1000))
+            self.peak_rss = max(self.peak_rss, rss_mb())
+
+    def stop(self):
+        self._stop = True
+
+
+# ── Session replay ─────────────────────────────────────────────────────────────
+
+def _sessions(conversations: list[dict], count: int) -> list[dict]:
+    return [conversations[i % len(conversations)] for i in range(count)]
+
+
+def _run_session_sync(agent, conv: dict, latencies: list, errors: list):
+    history: list[tuple[str, str]] = []
+    for turn in conv["turns"]:
+        start = time.perf_counter()
+        try:
+            reply = invoke_agent(agent, turn["user"], history)
+        except Exception as e:
+            errors.append(f"{conv['session']}: {e}")
+            return
+        latencies.append((time.perf_counter() - start) * 1000)
+        history += [("user", turn["user"]), ("assistant", reply)]
+
+
+async def _run_session_async(agent, conv: dict, latencies: list, errors: list):
+    history: list[tuple[str, str]] = []
+    for turn in conv["turns"]:
+        start = time.perf_counter()
+        try:
+            reply = await _invoke_agent(agent, turn["user"], history)
+        except Exception as e:
+            errors.append(f"{conv['session']}: {e}")
+            return
+        latencies.append((time.perf_counter() - start) * 1000)
+        history += [("user", turn["user"]), ("assistant", reply)]
+
+
+def run_level_threads(agent, sessions: list[dict], concurrency: int) -> dict:
+    latencies, errors = [], []
+    monitor = LagMonitor()
+    monitor_thread = threading.Thread(target=lambda: asyncio.run(monitor.run()), daemon=True)
+    rss_before = rss_mb()
+    monitor_thread.start()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for conv in sessions:
+            pool.submit(_run_session_sync, agent, conv, latencies, errors)
+    wall = time.perf_counter() - start
+
+    monitor.stop()
+    monitor_thread.join()
+    return _summarise(concurrency, sessions, latencies, errors, wall, monitor, rss_before)
+
+
+async def _run_level_async(agent, sessions: list[dict], concurrency: int) -> dict:
+    latencies, errors = [], []
+    monitor = LagMonitor()
+    rss_before = rss_mb()
+    monitor_task = asyncio.create_task(monitor.run())
+    sem = asyncio.Semaphore(concurrency)
+
+    async def bounded(conv):
+        async with sem:
+            await _run_session_async(agent, conv, latencies, errors)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(bounded(conv) for conv in sessions))
+    wall = time.perf_counter() - start
+
+    monitor.stop()
+    await monitor_task
+    return _summarise(concurrency, sessions, latencies, errors, wall, monitor, rss_before)
+
+
+def run_level_async(agent, sessions: list[dict], concurrency: int) -> dict:
+    return asyncio.run(_run_level_async(agent, sessions, concurrency))
+
+
+def _summarise(concurrency, sessions, latencies, errors, wall, monitor, rss_before) -> dict:
+    return {
+        "concurrency":        concurrency,
+        "sessions":           len(sessions),
+        "turns":              len(latencies),
+        "errors":             len(errors),
+        "first_error":        errors[0] if errors else None,
+        "wall_s":             round(wall, 3),
+        "throughput_tps":     round(len(latencies) / wall, 2) if wall else 0.0,
+        "latency_p50_ms":     round(percentile(latencies, 50), 1),
+        "latency_p95_ms":     round(percentile(latencies, 95), 1),
+        "latency_p99_ms":     round(percentile(latencies, 99), 1),
+        "loop_lag_p99_ms":    round(percentile(monitor.lags_ms, 99), 1),
+        "loop_lag_max_ms":    round(max(monitor.lags_ms, default=0.0), 1),
+        "rss_per_session_mb": round(max(0.0, monitor.peak_rss - rss_before) / concurrency, 2),
+    }
+
+
+def find_saturation(results: list[dict], min_gain: float = 0.10) -> int | None:
+    """
+    First concurrency level whose throughput gain over the previous level is
+    below min_gain (relative) — adding sessions past it only adds latency.
+    """
+    for prev, cur in zip(results, results[1:]):
+        if prev["throughput_tps"] and (cur["throughput_tps"] / prev["throughput_tps"] - 1) < min_gain:
+            return prev["concurrency"]
+    return None
+
+
+# ── Entry point ────────────────────────────────────────────────────────────────
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--conversations", type=Path, default=DEFAULT_CONVERSATIONS,
+                   help="Recorded conversations JSON (see bench/conversations.json)")
+    p.add_argument("--concurrency", default="1,5,10,20",
+                   help="Comma-separated concurrency levels to sweep")
+    p.add_argument("--sessions", type=int, default=0,
+                   help="Sessions per level (default: 4 × concurrency)")
+    p.add_argument("--mode", choices=["threads", "async"], default="threads")
+    p.add_argument("--llm-latency-ms",   type=float, default=600.0)
+    p.add_argument("--llm-jitter-ms",    type=float, default=150.0)
+    p.add_argument("--tool-latency-ms",  type=float, default=200.0)
+    p.add_argument("--tool-jitter-ms",   type=float, default=50.0)
+    p.add_argument("--embed-latency-ms", type=float, default=250.0)
+    p.add_argument("--num-vms", type=int, default=500, help="Size of the stub inventory")
+    p.add_argument("--json", action="store_true", help="Emit results as JSON")
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    conversations = json.loads(args.conversations.read_text())
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+
+    mcp_url = start_stub_mcp_server(
+        latency_ms=args.tool_latency_ms, jitter_ms=args.tool_jitter_ms, num_vms=args.num_vms,
+    )
+    llm = ScriptedChatModel(
+        script=build_script(conversations),
+        latency_ms=args.llm_latency_ms,
+        jitter_ms=args.llm_jitter_ms,
+    )
+    store = InMemoryVectorStore(HashingEmbeddings(latency_ms=args.embed_latency_ms))
+    store.add_documents([Document(page_content=text, metadata={"source": src}) for src, text in SAMPLE_RUNBOOKS])
+
+    agent = build_agent(get_mcp_tools(mcp_url), llm=llm, rag_tool=build_rag_tool(store))
+    run_level = run_level_threads if args.mode == "threads" else run_level_async
+
+    results = []
+    for level in levels:
+        sessions = _sessions(conversations, args.sessions or level * 4)
+        results.append(run_level(agent, sessions, level))
+        if not args.json:
+            r = results[-1]
+            print(
+                f"c={r['concurrency']:>3}  turns={r['turns']:>4}  err={r['errors']:>2}  "
+                f"tput={r['throughput_tps']:>7.2f}/s  "
+                f"p50={r['latency_p50_ms']:>7.1f}  p95={r['latency_p95_ms']:>7.1f}  "
+                f"p99={r['latency_p99_ms']:>7.1f} ms  "
+                f"lag p99={r['loop_lag_p99_ms']:>6.1f} ms  "
+                f"rss/session={r['rss_per_session_mb']:.2f} MB"
+            )
+            if r["first_error"]:
+                print(f"       first error: {r['first_error']}", file=sys.stderr)
+
+    saturation = find_saturation(results)
+    if args.json:
+        print(json.dumps({"mode": args.mode, "levels": results, "saturation_concurrency": saturation}, indent=2))
+    else:
+        print(f"\nSaturation point: {saturation if saturation else 'not reached'} concurrent sessions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+App start-up benchmark — import time per module.
+
+Runs `python -X importtime -c "import <target>"` in a fresh interpreter for
+each target and reports:
+
+  - wall time of the whole process and cumulative import time of the target
+  - self import time summed per top-level package (langchain_core, oci, ...)
+  - the slowest individual modules by self and by cumulative time
+
+Default targets:
+  streamlit_app  — what the first page render pays (should stay small)
+  bootstrap      — the start-up orchestrator (should be near-free)
+  agent / oci_llm / rag.retriever — what the background bootstrap pays
+
+Each target is measured --repeat times and the run with the median total
+is reported, so one cold-cache outlier does not skew the comparison.
+
+Usage (from app/):
+  python -m bench.startup
+  python -m bench.startup --targets streamlit_app,agent --top 15 --json > startup.json
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent
+
+DEFAULT_TARGETS = "streamlit_app,bootstrap,agent,oci_llm,rag.retriever"
+
+# import time:  self [us] | cumulative | imported package
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+def parse_importtime(stderr: str) -> list[dict]:
+    rows = []
+    for line in stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            rows.append({
+                "module":     m.group(4),
+                "self_ms":    int(m.group(1)) / 1000,
+                "cumul_ms":   int(m.group(2)) / 1000,
+                "depth":      (len(m.group(3)) - 1) // 2,
+            })
+    return rows
+
+
+def measure(target: str) -> dict:
+    env = dict(os.environ)
+    # config.py fails fast without these — nothing here talks to OCI
+    env.setdefault("COMPARTMENT_ID", "ocid1.compartment.oc1..offline-bench")
+    env.setdefault("OCI_AUTH_TYPE", "api_key")
+    start = time.perf_counter()
+    proc  = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=APP_DIR, env=env, capture_output=True, text=True,
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    rows    = parse_importtime(proc.stderr)
+    error   = None
+    if proc.returncode != 0:
+        error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"exit {proc.returncode}"
+    target_row = next((r for r in rows if r["module"] == target), None)
+    return {
+        "target":    target,
+        "wall_ms":   round(wall_ms, 1),
+        "import_ms": round(target_row["cumul_ms"], 1) if target_row else None,
+        "modules":   len(rows),
+        "rows":      rows,
+        "error":     error,
+    }
+
+
+def summarize(run: dict, top: int) -> dict:
+    rows     = run.pop("rows")
+    packages = defaultdict(float)
+    for r in rows:
+        packages[r["module"].split(".")[0]] += r["self_ms"]
+    run["by_package_ms"] = {
+        name: round(ms, 1)
+        for name, ms in sorted(packages.items(), key=lambda kv: kv[1], reverse=True)[:top]
+    }
+    run["slowest_self"] = [
+        {"module": r["module"], "self_ms": round(r["self_ms"], 1)}
+        for r in sorted(rows, key=lambda r: r["self_ms"], reverse=True)[:top]
+    ]
+    run["slowest_cumulative"] = [
+        {"module": r["module"], "cumul_ms": round(r["cumul_ms"], 1)}
+        for r in sorted(rows, key=lambda r: r["cumul_ms"], reverse=True)[:top]
+        if r["module"] != run["target"]
+    ]
+    return run
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--targets", default=DEFAULT_TARGETS)
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--top", type=int, default=10)
+    p.add_argument("--json", action="store_true")
+    args = p.parse_args(argv)
+
+    report = []
+    for target in args.targets.split(","):
+        runs = sorted((measure(target) for _ in range(max(1, args.repeat))),
+                      key=lambda r: r["import_ms"] or r["wall_ms"])
+        run  = summarize(runs[len(runs) // 2], args.top)
+        report.append(run)
+
+        if not args.json:
+            total = f"{run['import_ms']:.0f} ms" if run["import_ms"] is not None else "n/a"
+            print(f"\n{target}: import {total}, process {run['wall_ms']:.0f} ms, {run['modules']} modules")
+            if run["error"]:
+                print(f"    failed: {run['error']}")
+            for name, ms in run["by_package_ms"].items():
+                print(f"    {name:<32} {ms:>8.1f} ms")
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
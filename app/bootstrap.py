@@ -0,0 +1,141 @@
+"""
+Background, parallel start-up of the agent's dependencies.
+
+The first page render used to wait for everything in get_agent(): the
+LangChain / LangGraph / OCI imports, the GenAI client, the MCP SSE tool
+discovery and the PGVector store. Bootstrap runs those as independent
+components on a small thread pool as soon as the server process starts:
+
+  mcp  — MCP SSE session + tool discovery (agent.get_mcp_tools)
+  llm  — OCI GenAI chat client (oci_llm.build_llm)
+  rag  — DB pool, embeddings and PGVector collections (rag.retriever.warm_up)
+
+and assembles the agent once mcp and llm are ready. rag is best-effort:
+if Postgres is down the agent is still built and search_runbooks reports
+the error per call, as it always has.
+
+The UI polls status() and keeps the chat input disabled until ready.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+PENDING, RUNNING, READY, FAILED = "pending", "running", "ready", "failed"
+
+
+@dataclass
+class Component:
+    name:     str
+    label:    str
+    required: bool = True
+    state:    str = PENDING
+    seconds:  float = 0.0
+    error:    str | None = None
+
+
+def _load_mcp():
+    from agent import get_mcp_tools
+    return get_mcp_tools()
+
+
+def _load_llm():
+    from oci_llm import build_llm
+    return build_llm()
+
+
+def _load_rag():
+    from rag.retriever import warm_up
+    warm_up()
+
+
+LOADERS = {
+    "mcp": ("vCenter MCP tools", True,  _load_mcp),
+    "llm": ("OCI GenAI model",   True,  _load_llm),
+    "rag": ("Runbook search",    False, _load_rag),
+}
+
+
+class Bootstrap:
+    """
+    One per server process. start() returns immediately; agent / error are
+    set once the required components finish. retry() re-runs failed ones.
+    """
+
+    def __init__(self):
+        self.components = {
+            name: Component(name, label, required)
+            for name, (label, required, _) in LOADERS.items()
+        }
+        self.agent   = None
+        self.error   = None
+        self.started = 0.0
+        self.total   = 0.0
+        self._results: dict = {}
+        self._lock   = threading.Lock()
+        self._thread = None
+
+    @property
+    def ready(self) -> bool:
+        return self.agent is not None
+
+    @property
+    def busy(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> "Bootstrap":
+        with self._lock:
+            self._start_locked()
+        return self
+
+    def retry(self) -> "Bootstrap":
+        with self._lock:
+            # Two sessions can press Retry at once — only reset components
+            # when no run is in flight to read them
+            if self.ready or self.busy:
+                return self
+            for comp in self.components.values():
+                if comp.state == FAILED:
+                    comp.state, comp.error = PENDING, None
+            self._start_locked()
+        return self
+
+    def _start_locked(self):
+        if self.ready or self.busy:
+            return
+        self.error   = None
+        self.started = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="bootstrap", daemon=True)
+        self._thread.start()
+
+    def status(self) -> list[Component]:
+        return list(self.components.values())
+
+    def _run_component(self, name: str):
+        comp = self.components[name]
+        comp.state = RUNNING
+        start = time.monotonic()
+        try:
+            self._results[name] = LOADERS[name][2]()
+            comp.state = READY
+        except Exception as e:
+            comp.state, comp.error = FAILED, str(e)
+        finally:
+            comp.seconds = time.monotonic() - start
+
+    def _run(self):
+        todo = [c.name for c in self.components.values() if c.state != READY]
+        with ThreadPoolExecutor(max_workers=len(todo) or 1, thread_name_prefix="bootstrap") as pool:
+            list(pool.map(self._run_component, todo))
+
+        failed = [c for c in self.components.values() if c.required and c.state == FAILED]
+        if failed:
+            self.error = "; ".join(f"{c.label}: {c.error}" for c in failed)
+        else:
+            try:
+                from agent import build_agent
+                self.agent = build_agent(self._results["mcp"], llm=self._results["llm"])
+            except Exception as e:
+                self.error = str(e)
+        self.total = time.monotonic() - self.started
@@ -5,10 +5,20 @@ Auth strategy:
   - OCI Compute VM (production): INSTANCE_PRINCIPAL — no credentials needed,
     VM identity is granted GenAI access via IAM dynamic group + policy.
   - Local dev: API_KEY — reads ~/.oci/config automatically.
+
+Every chat model handed to the agent is wrapped in ThrottledChatModel, which
+enforces the process-wide LLM concurrency cap and retries GenAI throttling.
 """
 
+from typing import Any
+
 from langchain_community.chat_models.oci_generative_ai import ChatOCIGenAI
 from langchain_community.embeddings import OCIGenAIEmbeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.outputs import ChatResult
+from pydantic import Field
+
+from scheduler import llm_limiter, retry_rate_limited, aretry_rate_limited
 
 from config import (
     OCI_AUTH_TYPE,
@@ -18,6 +28,8 @@ from config import (
     EMBED_MODEL_ID,
     LLM_TEMPERATURE,
     LLM_MAX_TOKENS,
+    LLM_MAX_RETRIES,
+    RAG_RERANK_MODEL_ID,
 )
 
 
@@ -61,3 +73,83 @@ def build_embeddings() -> OCIGenAIEmbeddings:
         compartment_id=COMPARTMENT_ID,
         truncate="END",
     )
+
+
+def build_reranker():
+    """
+    Return a rerank(query, texts, top_n) -> [indices] callable backed by the
+    OCI GenAI rerank endpoint, or None when RAG_RERANK_MODEL_ID is unset.
+    LangChain has no OCI rerank wrapper, so this uses the OCI SDK directly.
+    """
+    if not RAG_RERANK_MODEL_ID:
+        return None
+
+    import oci
+    from oci.generative_ai_inference import GenerativeAiInferenceClient
+    from oci.generative_ai_inference.models import OnDemandServingMode, RerankTextDetails
+
+    if _auth_type() == "INSTANCE_PRINCIPAL":
+        client = GenerativeAiInferenceClient(
+            config={},
+            signer=oci.auth.signers.InstancePrincipalsSecurityTokenSigner(),
+            service_endpoint=OCI_GENAI_ENDPOINT,
+        )
+    else:
+        client = GenerativeAiInferenceClient(oci.config.from_file(), service_endpoint=OCI_GENAI_ENDPOINT)
+
+    def rerank(query: str, texts: list[str], top_n: int) -> list[int]:
+        details = RerankTextDetails(
+            input=query,
+            documents=texts,
+            top_n=top_n,
+            compartment_id=COMPARTMENT_ID,
+            serving_mode=OnDemandServingMode(model_id=RAG_RERANK_MODEL_ID),
+        )
+        response = retry_rate_limited(lambda: client.rerank_text(details))
+        return [r.index for r in response.data.document_ranks]
+
+    return rerank
+
+
+class ThrottledChatModel(BaseChatModel):
+    """
+    Wraps a chat model with the global LLM concurrency limit and 429 retry.
+
+    The limiter slot is held only for the call itself, never across backoff
+    sleeps, so a throttled session does not block others from the pool.
+    bind_tools delegates to the wrapped model and re-binds its tool kwargs
+    here, so provider-specific tool formatting is preserved.
+
+    Calls run as this model's callback run: the run manager is passed to the
+    inner model (token and error events reach tracing) and the inner model's
+    own callbacks are inherited unless others are given.
+    """
+
+    inner:       BaseChatModel
+    limiter:     Any = Field(default=llm_limiter, exclude=True)
+    max_retries: int = LLM_MAX_RETRIES
+
+    def __init__(self, **data):
+        if data.get("callbacks") is None and data.get("inner") is not None:
+            data["callbacks"] = data["inner"].callbacks
+        super().__init__(**data)
+
+    @property
+    def _llm_type(self) -> str:
+        return f"throttled-{self.inner._llm_type}"
+
+    def bind_tools(self, tools, **kwargs):
+        bound = self.inner.bind_tools(tools, **kwargs)
+        return self.bind(**getattr(bound, "kwargs", {}))
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        def call():
+            with self.limiter:
+                return self.inner._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        return retry_rate_limited(call, self.max_retries)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        async def call():
+            async with self.limiter:
+                return await self.inner._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        return await aretry_rate_limited(call, self.max_retries)
@@ -0,0 +1,190 @@
+"""
+Retrieval caches for search_runbooks.
+
+  QueryEmbeddingCache — LRU of query embeddings keyed by (model ID,
+                        normalised query text), optionally persisted to a
+                        sqlite file so restarts keep the warm set
+  CachedEmbeddings    — Embeddings wrapper that serves embed_query from it;
+                        embed_documents (ingest) always goes to OCI
+  ResultCache         — short-TTL cache of final search results
+
+Result entries are tagged with the collection's ingest generation: a
+counter in a marker file in INGEST_STATE_DIR that rag/ingest.py increases
+after every run that changes the collection. Ingest runs in a separate
+process (docker exec) in the same container, so reading that file is how
+the app learns about it.
+
+One instance of each is created per server process (see rag/retriever.py),
+so every browser session shares the warm entries.
+"""
+
+import array
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from langchain_core.embeddings import Embeddings
+
+from config import INGEST_STATE_DIR
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive cache key for a query."""
+    return " ".join(query.lower().split())
+
+
+# ── Ingest generation marker ───────────────────────────────────────────────────
+
+def _generation_path(collection: str) -> Path:
+    return Path(INGEST_STATE_DIR) / f"generation_{collection}"
+
+
+def collection_generation(collection: str) -> int:
+    """
+    Monotonic token that changes whenever ingest writes to the collection.
+    It is the number stored in the marker, not its mtime: two bumps within
+    one filesystem timestamp tick would otherwise look like none.
+    """
+    try:
+        return int(_generation_path(collection).read_text().strip() or 0)
+    except (OSError, ValueError):
+        return 0
+
+
+def bump_generation(collection: str):
+    """Called by ingest after it adds or deletes chunks in the collection."""
+    path = _generation_path(collection)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Strictly increasing even if the clock steps back; replaced atomically
+    # so a reader never sees a half-written number
+    token = max(collection_generation(collection) + 1, time.time_ns())
+    tmp   = path.with_name(f".{path.name}.{os.getpid()}")
+    tmp.write_text(str(token))
+    os.replace(tmp, path)
+
+
+# ── Query embeddings ───────────────────────────────────────────────────────────
+
+class QueryEmbeddingCache:
+    """Thread-safe LRU of query vectors with optional sqlite persistence."""
+
+    def __init__(self, maxsize: int, path: str = ""):
+        self.maxsize = maxsize
+        self.hits    = 0
+        self.misses  = 0
+        self._lru: OrderedDict[str, list[float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db   = None
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS query_embeddings (key TEXT PRIMARY KEY, vec BLOB)")
+            self._db.commit()
+
+    def get(self, key: str) -> list[float] | None:
+        with self._lock:
+            vec = self._lru.get(key)
+            if vec is not None:
+                self._lru.move_to_end(key)
+                self.hits += 1
+                return vec
+            if self._db is not None:
+                row = self._db.execute("SELECT vec FROM query_embeddings WHERE key = ?", (key,)).fetchone()
+                if row:
+                    vec = array.array("f", row[0]).tolist()
+                    self._put_locked(key, vec)
+                    self.hits += 1
+                    return vec
+            self.misses += 1
+            return None
+
+    def put(self, key: str, vec: list[float]):
+        with self._lock:
+            self._put_locked(key, vec)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO query_embeddings (key, vec) VALUES (?, ?)",
+                    (key, array.array("f", vec).tobytes()),
+                )
+                self._db.commit()
+
+    def _put_locked(self, key: str, vec: list[float]):
+        self._lru[key] = vec
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.maxsize:
+            self._lru.popitem(last=False)
+
+
+class CachedEmbeddings(Embeddings):
+    """Serve embed_query from a QueryEmbeddingCache; delegate everything else."""
+
+    def __init__(self, inner: Embeddings, cache: QueryEmbeddingCache, model_id: str):
+        self.inner    = inner
+        self.cache    = cache
+        self.model_id = model_id
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.inner.embed_documents(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        key = f"{self.model_id}\x00{normalize_query(text)}"
+        vec = self.cache.get(key)
+        if vec is None:
+            vec = self.inner.embed_query(text)
+            self.cache.put(key, vec)
+        return vec
+
+
+# ── Search results ─────────────────────────────────────────────────────────────
+
+class ResultCache:
+    """
+    TTL + LRU cache of search results. An entry is served only while it is
+    younger than ttl and its collection's ingest generation is unchanged.
+    """
+
+    def __init__(self, ttl: float, maxsize: int):
+        self.ttl     = ttl
+        self.maxsize = maxsize
+        self.hits    = 0
+        self.misses  = 0
+        self._entries: OrderedDict[tuple, tuple[int, float, object]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(collection: str, query: str, k: int, **filters) -> tuple:
+        return (collection, normalize_query(query), k, tuple(sorted(filters.items())))
+
+    @staticmethod
+    def generation(key: tuple) -> int:
+        """Read before searching and pass to put(), so results found while an ingest runs stay stale."""
+        return collection_generation(key[0])
+
+    def get(self, key: tuple, generation: int | None = None):
+        if self.ttl <= 0:
+            return None
+        if generation is None:
+            generation = self.generation(key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == generation and entry[1] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            if entry:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: tuple, value, generation: int):
+        """generation: the value generation() returned before the search that produced value."""
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (generation, time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
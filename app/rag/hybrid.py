@@ -0,0 +1,157 @@
+"""
+Hybrid runbook retrieval — Postgres full-text + pgvector, fused with RRF.
+
+Cohere embeddings are good at "what is the procedure for X" but blur exact
+tokens: error codes, VM names, KB numbers. hybrid_search() runs both
+retrievers in parallel over a wider candidate set (RAG_CANDIDATES):
+
+  lexical — to_tsvector(RAG_FTS_CONFIG, document) against the query terms
+            OR-ed together, ranked by ts_rank_cd (GIN index from rag/index.py)
+  vector  — PGVector similarity search (HNSW index)
+
+then fuses the two rankings with reciprocal-rank fusion, drops
+near-duplicate chunks (overlapping splits, the same paragraph in two
+runbooks), optionally reranks with an OCI GenAI rerank model, and returns
+the top k.
+"""
+
+import hashlib
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from sqlalchemy import text
+from langchain_core.documents import Document
+
+from rag.index import EMBEDDING_TABLE
+from config import (
+    RAG_CANDIDATES,
+    RAG_FTS_CONFIG,
+    RAG_RRF_K,
+    RAG_DEDUP_THRESHOLD,
+)
+
+# Shared by every session — two short DB queries per search
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="hybrid-search")
+
+if not re.fullmatch(r"[a-z_]+", RAG_FTS_CONFIG):
+    raise ValueError(f"RAG_FTS_CONFIG must be a text search configuration name, got {RAG_FTS_CONFIG!r}")
+
+# Inlined as a literal (not a bind parameter) so the planner matches the
+# expression index  to_tsvector('<cfg>'::regconfig, document)
+FTS_VECTOR = f"to_tsvector('{RAG_FTS_CONFIG}'::regconfig, e.document)"
+
+
+def _doc_key(doc: Document) -> str:
+    return doc.id or hashlib.md5(doc.page_content.encode()).hexdigest()
+
+
+# ── Retrievers ─────────────────────────────────────────────────────────────────
+
+def lexical_search(engine, collection: str, query: str, k: int,
+                   source: str | None = None, doc_type: str | None = None) -> list[Document]:
+    """
+    Full-text search within one collection. plainto_tsquery handles parsing
+    (hyphenated names like web-prod-01 keep the whole token and its parts);
+    its AND-ed terms are rewritten to OR so partial matches still rank.
+    """
+    clauses = ["c.name = :collection", f"{FTS_VECTOR} @@ q"]
+    params  = {"collection": collection, "query": query, "k": k}
+    if source:
+        clauses.append("e.cmetadata->>'source' ILIKE :source")
+        params["source"] = f"%{source}%"
+    if doc_type:
+        clauses.append("e.cmetadata->>'doc_type' = :doc_type")
+        params["doc_type"] = doc_type.lower().lstrip(".")
+
+    sql = text(f"""
+        SELECT e.id, e.document, e.cmetadata, ts_rank_cd({FTS_VECTOR}, q) AS rank
+        FROM {EMBEDDING_TABLE} e
+        JOIN langchain_pg_collection c ON c.uuid = e.collection_id,
+             CAST(replace(plainto_tsquery('{RAG_FTS_CONFIG}'::regconfig, :query)::text, '&', '|') AS tsquery) q
+        WHERE {" AND ".join(clauses)}
+        ORDER BY rank DESC
+        LIMIT :k
+    """)
+    with engine.connect() as conn:
+        rows = conn.execute(sql, params).all()
+    return [Document(id=str(r.id), page_content=r.document, metadata=r.cmetadata or {}) for r in rows]
+
+
+# ── Fusion, dedup, rerank ──────────────────────────────────────────────────────
+
+def rrf_fuse(rankings: list[list[Document]], k: int = RAG_RRF_K) -> list[Document]:
+    """Reciprocal-rank fusion: score(d) = Σ 1 / (k + rank_i(d)), rank 1-based."""
+    scores: dict[str, float] = {}
+    docs:   dict[str, Document] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, 1):
+            key = _doc_key(doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            docs.setdefault(key, doc)
+    return [docs[key] for key in sorted(scores, key=scores.get, reverse=True)]
+
+
+def _shingles(content: str, n: int = 3) -> set[tuple[str, ...]]:
+    words = re.findall(r"\w+", content.lower())
+    if len(words) < n:
+        return {tuple(words)}
+    return {tuple(words[i:i + n]) for i in range(len(words) - n + 1)}
+
+
+def drop_near_duplicates(docs: list[Document], threshold: float = RAG_DEDUP_THRESHOLD) -> list[Document]:
+    """
+    Keep the first of any group of near-duplicate chunks. Containment
+    (overlap / smaller set) rather than Jaccard, so a short tail chunk that
+    sits entirely inside a longer neighbouring split is caught too.
+    """
+    kept: list[tuple[Document, set]] = []
+    for doc in docs:
+        sh = _shingles(doc.page_content)
+        if any(len(sh & other) / max(1, min(len(sh), len(other))) >= threshold for _, other in kept):
+            continue
+        kept.append((doc, sh))
+    return [doc for doc, _ in kept]
+
+
+# ── Entry point ────────────────────────────────────────────────────────────────
+
+def hybrid_search(
+    store,
+    query: str,
+    k: int,
+    *,
+    engine=None,
+    collection: str | None = None,
+    flt: dict | None = None,
+    source: str | None = None,
+    doc_type: str | None = None,
+    reranker: Callable[[str, list[str], int], list[int]] | None = None,
+    candidates: int = RAG_CANDIDATES,
+) -> list[Document]:
+    """
+    Run lexical and vector retrieval in parallel and return the top k fused,
+    de-duplicated (and optionally reranked) chunks. Without an engine (e.g. an
+    in-memory store in the bench harnesses) only the vector side runs.
+    """
+    vector_f = _executor.submit(store.similarity_search, query, k=candidates, filter=flt)
+    lexical_f = None
+    if engine is not None and collection:
+        lexical_f = _executor.submit(lexical_search, engine, collection, query, candidates, source, doc_type)
+
+    rankings = [vector_f.result()]
+    if lexical_f is not None:
+        try:
+            rankings.append(lexical_f.result())
+        except Exception as e:
+            # Lexical is an enhancement — never fail the search because of it
+            print(f"Warning: full-text search failed, using vector results only: {e}")
+
+    fused = drop_near_duplicates(rrf_fuse(rankings))
+    if reranker and len(fused) > 1:
+        try:
+            order = reranker(query, [d.page_content for d in fused], k)
+            fused = [fused[i] for i in order]
+        except Exception as e:
+            print(f"Warning: rerank failed, keeping fused order: {e}")
+    return fused[:k]
@@ -0,0 +1,168 @@
+"""
+ANN and metadata index management for the langchain-postgres schema.
+
+langchain_postgres creates langchain_pg_embedding with an untyped `vector`
+column and no approximate index, so every search_runbooks call is a
+sequential scan over every chunk of every collection. ensure_indexes():
+
+  1. Pins the column to vector(EMBED_DIMENSIONS) — HNSW/IVFFlat need a fixed size
+  2. Creates the configured ANN index (cosine ops, matching PGVector's default
+     distance strategy). Parameters are encoded in the index name, so a
+     config change builds the new index before dropping the old one
+  3. Adds indexes for metadata filters (collection_id, source, doc_type)
+     and a GIN full-text index for the lexical half of rag/hybrid.py
+  4. ANALYZEs the table so the planner sees current statistics
+
+Query-time knobs (hnsw.ef_search, ivfflat.probes, hnsw.iterative_scan) are
+set per connection through pg_engine_args(), used by both ingest and the
+retriever.
+
+Usage:
+  python -m rag.index           # from app/ — (re)build indexes without ingesting
+"""
+
+import math
+
+import sqlalchemy
+from sqlalchemy import text
+
+from config import (
+    PG_CONNECTION_STRING,
+    EMBED_DIMENSIONS,
+    RAG_INDEX_TYPE,
+    RAG_HNSW_M,
+    RAG_HNSW_EF_CONSTRUCTION,
+    RAG_HNSW_EF_SEARCH,
+    RAG_HNSW_ITERATIVE_SCAN,
+    RAG_IVFFLAT_LISTS,
+    RAG_IVFFLAT_PROBES,
+    RAG_FTS_CONFIG,
+)
+
+EMBEDDING_TABLE = "langchain_pg_embedding"
+ANN_PREFIX      = "ix_embedding_ann_"
+
+
+def pg_engine_args() -> dict:
+    """SQLAlchemy engine_args that set ANN query-time parameters per connection."""
+    options = [f"-c hnsw.ef_search={RAG_HNSW_EF_SEARCH}", f"-c ivfflat.probes={RAG_IVFFLAT_PROBES}"]
+    if RAG_HNSW_ITERATIVE_SCAN:
+        # Keeps filtered HNSW scans (collection / metadata) from returning < k rows
+        options.append(f"-c hnsw.iterative_scan={RAG_HNSW_ITERATIVE_SCAN}")
+    return {"connect_args": {"options": " ".join(options)}}
+
+
+def _ivfflat_lists(rows: int) -> int:
+    """pgvector guidance: rows / 1000 up to 1M rows, sqrt(rows) beyond."""
+    if RAG_IVFFLAT_LISTS:
+        return RAG_IVFFLAT_LISTS
+    if rows <= 1_000_000:
+        return max(10, rows // 1000)
+    return int(math.sqrt(rows))
+
+
+def ann_index_spec(rows: int) -> tuple[str, str] | None:
+    """Return (index_name, CREATE INDEX statement) for the configured type."""
+    if RAG_INDEX_TYPE == "hnsw":
+        name = f"{ANN_PREFIX}hnsw_m{RAG_HNSW_M}_ef{RAG_HNSW_EF_CONSTRUCTION}"
+        return name, (
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {EMBEDDING_TABLE} "
+            f"USING hnsw (embedding vector_cosine_ops) "
+            f"WITH (m = {RAG_HNSW_M}, ef_construction = {RAG_HNSW_EF_CONSTRUCTION})"
+        )
+    if RAG_INDEX_TYPE == "ivfflat":
+        lists = _ivfflat_lists(rows)
+        name  = f"{ANN_PREFIX}ivfflat_l{lists}"
+        return name, (
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {EMBEDDING_TABLE} "
+            f"USING ivfflat (embedding vector_cosine_ops) WITH (lists = {lists})"
+        )
+    return None
+
+
+METADATA_INDEXES = [
+    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_embedding_collection_id ON {EMBEDDING_TABLE} (collection_id)",
+    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_cmetadata_doc_type ON {EMBEDDING_TABLE} ((cmetadata->>'doc_type'))",
+    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_cmetadata_source ON {EMBEDDING_TABLE} ((cmetadata->>'source'))",
+    # Must match the expression in rag/hybrid.py exactly for the planner to use it
+    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_embedding_fts_{RAG_FTS_CONFIG} ON {EMBEDDING_TABLE} "
+    f"USING gin (to_tsvector('{RAG_FTS_CONFIG}'::regconfig, document))",
+]
+
+# Substring matches on source ($ilike '%name%') need a trigram index
+TRGM_INDEX = (
+    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_cmetadata_source_trgm ON {EMBEDDING_TABLE} "
+    f"USING gin ((cmetadata->>'source') gin_trgm_ops)"
+)
+
+
+def _pin_dimensions(conn):
+    typmod = conn.execute(text(
+        "SELECT atttypmod FROM pg_attribute "
+        f"WHERE attrelid = '{EMBEDDING_TABLE}'::regclass AND attname = 'embedding'"
+    )).scalar()
+    if typmod is not None and typmod > 0:
+        if typmod != EMBED_DIMENSIONS:
+            print(f"  Warning: embedding column is vector({typmod}), EMBED_DIMENSIONS={EMBED_DIMENSIONS}")
+        return
+    print(f"  Pinning embedding column to vector({EMBED_DIMENSIONS})")
+    conn.execute(text(
+        f"ALTER TABLE {EMBEDDING_TABLE} ALTER COLUMN embedding TYPE vector({EMBED_DIMENSIONS})"
+    ))
+
+
+def ensure_indexes(connection_string: str = PG_CONNECTION_STRING):
+    """Create / refresh ANN and metadata indexes. Safe to run repeatedly."""
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    engine = sqlalchemy.create_engine(connection_string, isolation_level="AUTOCOMMIT")
+    try:
+        with engine.connect() as conn:
+            exists = conn.execute(text(f"SELECT to_regclass('{EMBEDDING_TABLE}')")).scalar()
+            if not exists:
+                print("  No embedding table yet — skipping index maintenance.")
+                return
+
+            _pin_dimensions(conn)
+            conn.execute(text(f"ANALYZE {EMBEDDING_TABLE}"))   # fresh reltuples for sizing
+
+            rows = conn.execute(text(
+                "SELECT reltuples::bigint FROM pg_class WHERE relname = :t"
+            ), {"t": EMBEDDING_TABLE}).scalar() or 0
+            spec = ann_index_spec(max(rows, 0))
+            existing = dict(conn.execute(text(
+                "SELECT c.relname, i.indisvalid FROM pg_index i "
+                "JOIN pg_class c ON c.oid = i.indexrelid "
+                f"WHERE i.indrelid = '{EMBEDDING_TABLE}'::regclass AND c.relname LIKE :p"
+            ), {"p": f"{ANN_PREFIX}%"}).all())
+
+            if spec:
+                name, ddl = spec
+                if existing.get(name) is False:
+                    # Left INVALID by an interrupted CONCURRENTLY build
+                    conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+                    existing.pop(name)
+                if name not in existing:
+                    print(f"  Building ANN index {name} (~{rows} rows)...")
+                    conn.execute(text(ddl))
+                existing.pop(name, None)
+            for stale in sorted(existing):
+                print(f"  Dropping superseded ANN index {stale}")
+                conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {stale}"))
+
+            for ddl in METADATA_INDEXES:
+                conn.execute(text(ddl))
+            try:
+                conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+                conn.execute(text(TRGM_INDEX))
+            except sqlalchemy.exc.DBAPIError as e:
+                print(f"  Warning: pg_trgm unavailable, source substring filters will scan: {e.orig}")
+
+            conn.execute(text(f"ANALYZE {EMBEDDING_TABLE}"))
+    finally:
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    print(f"Ensuring '{RAG_INDEX_TYPE}' ANN and metadata indexes on {EMBEDDING_TABLE}...")
+    ensure_indexes()
+    print("Done.")
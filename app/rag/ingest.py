@@ -5,93 +5,64 @@ Loads PDF and Markdown runbooks from RUNBOOKS_DIR, chunks them,
 embeds them using OCI GenAI Cohere, and stores them in OCI PostgreSQL
 via pgvector (langchain-postgres PGVector).
 
+Incremental: a per-file manifest (rag/manifest.py) records size, mtime,
+content hash and chunk IDs of everything already ingested. Only new or
+changed files are loaded, and of their chunks only those the collection
+does not already hold are embedded; chunks belonging to changed or
+deleted files are removed from the collection.
+
+Files are parsed and chunked in a process pool and streamed one at a
+time (rag/loader.py) into rag/pipeline.py: concurrent embed calls with
+adaptive batch size, overlapped upserts, retries, and a checkpoint log so
+a crashed run resumes where it stopped.
+
+After writing, rag/index.py creates or refreshes the ANN (HNSW/IVFFlat)
+and metadata indexes. Every change to the collection bumps its generation
+marker (rag/cache.py) so the app's search-result cache drops stale entries.
+
 Usage:
   python -m rag.ingest                    # from app/ directory
+  python -m rag.ingest --full             # ignore the manifest, re-embed everything
   docker exec -it vcenter_app python -m rag.ingest
 """
 
+import argparse
 import sys
 import hashlib
 from pathlib import Path
 
-from langchain_community.document_loaders import PyPDFLoader, TextLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_postgres import PGVector
-from langchain_core.documents import Document
 
 from oci_llm import build_embeddings
+# load_documents / chunk_documents stay importable from here for existing callers
+from rag.cache import bump_generation
+from rag.loader import find_runbooks, load_documents, chunk_documents, stream_files
+from rag.index import ensure_indexes, pg_engine_args
+from rag.manifest import Manifest
+from rag.pipeline import AdaptiveController, Checkpoint, EmbeddingPipeline
 from config import (
     PG_CONNECTION_STRING,
     PG_COLLECTION_NAME,
-    RAG_CHUNK_SIZE,
-    RAG_CHUNK_OVERLAP,
+    EMBED_DIMENSIONS,
     RUNBOOKS_DIR,
+    RAG_MANIFEST_PATH,
+    RAG_CHECKPOINT_PATH,
+    RAG_EMBED_BATCH_SIZE,
+    RAG_EMBED_MAX_BATCH,
+    RAG_EMBED_CONCURRENCY,
+    RAG_EMBED_MAX_CONCURRENCY,
+    RAG_WRITE_QUEUE,
+    RAG_LOADER_WORKERS,
+    RAG_PARSE_TIMEOUT,
 )
 
-BATCH_SIZE = 64  # conservative batch size for OCI embed API rate limits
-
-
-def load_documents(directory: str) -> list[Document]:
-    """
-    Recursively load all .pdf and .md/.txt files from the given directory.
-    Returns a flat list of LangChain Document objects.
-    """
-    docs = []
-    base = Path(directory)
-
-    if not base.exists():
-        print(f"Warning: runbooks directory not found at {directory}")
-        return docs
-
-    for path in sorted(base.rglob("*.pdf")):
-        try:
-            loader = PyPDFLoader(str(path))
-            pages = loader.load()
-            docs.extend(pages)
-            print(f"  Loaded {len(pages)} pages from {path.name}")
-        except Exception as e:
-            print(f"  Warning: could not load {path.name}: {e}")
-
-    for path in sorted(base.rglob("*.md")):
-        try:
-            loader = TextLoader(str(path), encoding="utf-8")
-            pages = loader.load()
-            docs.extend(pages)
-            print(f"  Loaded {len(pages)} page(s) from {path.name}")
-        except Exception as e:
-            print(f"  Warning: could not load {path.name}: {e}")
-
-    for path in sorted(base.rglob("*.txt")):
-        try:
-            loader = TextLoader(str(path), encoding="utf-8")
-            pages = loader.load()
-            docs.extend(pages)
-            print(f"  Loaded {len(pages)} page(s) from {path.name}")
-        except Exception as e:
-            print(f"  Warning: could not load {path.name}: {e}")
-
-    return docs
-
-
-def chunk_documents(docs: list[Document]) -> tuple[list[Document], list[str]]:
-    """
-    Split documents into overlapping chunks.
-    Returns (chunks, ids) where each id is a stable hash of the content —
-    allowing safe re-ingest without duplicates.
-    """
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=RAG_CHUNK_SIZE,
-        chunk_overlap=RAG_CHUNK_OVERLAP,
-        separators=["\n\n", "\n", ". ", " ", ""],
-    )
-    chunks = splitter.split_documents(docs)
 
-    # Stable content-hash IDs for idempotent upsert
-    ids = [
-        hashlib.md5(chunk.page_content.encode()).hexdigest()
-        for chunk in chunks
-    ]
-    return chunks, ids
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
 
 
 def build_vectorstore() -> PGVector:
@@ -107,36 +78,186 @@ def build_vectorstore() -> PGVector:
         collection_name=PG_COLLECTION_NAME,
         connection=PG_CONNECTION_STRING,
         use_jsonb=True,   # store metadata as JSONB for efficient filtering
+        embedding_length=EMBED_DIMENSIONS,   # typed column so ANN indexes can be built
+        engine_args=pg_engine_args(),
     )
 
 
-def run_ingest():
-    """Main entry point for the ingest pipeline."""
-    print(f"\nLoading documents from: {RUNBOOKS_DIR}")
-    docs = load_documents(RUNBOOKS_DIR)
+def plan_ingest(files: list[Path], base: Path, manifest: Manifest, force: bool = False):
+    """
+    Compare the runbooks on disk against the manifest.
+
+    Size + mtime unchanged → skip without reading the file. Otherwise the
+    content hash decides: a touched-but-identical file only has its
+    manifest entry refreshed.
+
+    Returns (pending, unchanged, removed):
+      pending   — [(key, path, stat_entry)] files to load and embed
+      unchanged — [key] files already ingested at this content
+      removed   — [key] manifest entries whose file no longer exists
+    """
+    pending, unchanged = [], []
+    on_disk = set()
+
+    for path in files:
+        key = path.relative_to(base).as_posix()
+        on_disk.add(key)
+        st    = path.stat()
+        stat  = {"size": st.st_size, "mtime": st.st_mtime}
+        entry = manifest.get(key)
+
+        if entry and not force:
+            if entry["size"] == stat["size"] and entry["mtime"] == stat["mtime"]:
+                unchanged.append(key)
+                continue
+            sha = file_sha256(path)
+            if sha == entry["sha256"]:
+                manifest.set(key, {**entry, **stat})
+                unchanged.append(key)
+                continue
+            stat["sha256"] = sha
+
+        pending.append((key, path, stat))
 
-    if not docs:
-        print("\nNo documents found. Drop PDF or Markdown files into the runbooks/ directory.")
+    removed = [key for key in manifest.entries if key not in on_disk]
+    return pending, unchanged, removed
+
+
+def _delete_stale(vectorstore: PGVector, manifest: Manifest, pipeline: EmbeddingPipeline,
+                  key: str, old_ids: set[str]) -> int:
+    """
+    Delete old chunk IDs of `key` that no other file still references and
+    that this run is not about to keep (IDs claimed by pending files).
+    The pipeline forgets them too: a later file or resumed run must not
+    skip re-embedding a chunk whose row is gone.
+    """
+    stale = old_ids - manifest.ids_referenced(exclude=key) - pipeline.claimed_ids
+    if stale:
+        vectorstore.delete(ids=sorted(stale))
+        pipeline.forget(stale)
+    return len(stale)
+
+
+def run_ingest(force: bool = False):
+    """Main entry point for the ingest pipeline."""
+    base = Path(RUNBOOKS_DIR)
+    if not base.exists():
+        # Never treat a missing mount as "every file was deleted"
+        print(f"Warning: runbooks directory not found at {RUNBOOKS_DIR}")
         sys.exit(0)
 
-    print(f"\nLoaded {len(docs)} document pages total.")
+    manifest = Manifest.load(RAG_MANIFEST_PATH)
+    print(f"\nScanning {RUNBOOKS_DIR} (manifest: {RAG_MANIFEST_PATH})")
+    files = find_runbooks(RUNBOOKS_DIR)
+    pending, unchanged, removed = plan_ingest(files, base, manifest, force)
+
+    skipped_chunks = sum(len(manifest.get(k)["chunk_ids"]) for k in unchanged)
+    print(
+        f"  {len(files)} file(s): {len(pending)} new/changed, "
+        f"{len(unchanged)} unchanged, {len(removed)} removed."
+    )
 
-    chunks, ids = chunk_documents(docs)
-    print(f"Split into {len(chunks)} chunks (size={RAG_CHUNK_SIZE}, overlap={RAG_CHUNK_OVERLAP}).")
+    if not pending and not removed:
+        manifest.save()   # persist refreshed mtimes of touched-but-identical files
+        if not files:
+            print("\nNo documents found. Drop PDF or Markdown files into the runbooks/ directory.")
+        else:
+            print(f"\nNothing to do — {skipped_chunks} chunks already up to date.")
+        return
 
     print(f"\nConnecting to OCI PostgreSQL (collection: {PG_COLLECTION_NAME})...")
     vectorstore = build_vectorstore()
+    checkpoint  = Checkpoint(RAG_CHECKPOINT_PATH)
+    if checkpoint.ids:
+        print(f"  Resuming: {len(checkpoint.ids)} chunk(s) already written by an interrupted run")
 
-    print(f"Upserting chunks in batches of {BATCH_SIZE}...")
-    for i in range(0, len(chunks), BATCH_SIZE):
-        batch_chunks = chunks[i : i + BATCH_SIZE]
-        batch_ids    = ids[i : i + BATCH_SIZE]
-        vectorstore.add_documents(documents=batch_chunks, ids=batch_ids)
-        end = min(i + BATCH_SIZE, len(chunks))
-        print(f"  Upserted {end}/{len(chunks)} chunks")
+    deleted  = 0
+    failed   = 0
+    in_run: dict[str, tuple[Path, dict, list[str]]] = {}
 
-    print(f"\nIngest complete. {len(chunks)} chunks stored in '{PG_COLLECTION_NAME}'.")
+    def on_file_done(key: str):
+        # Runs on a pipeline thread (serialised by the pipeline's lock)
+        nonlocal deleted
+        path, stat, ids = in_run.pop(key)
+        old   = manifest.get(key)
+        stale = set(old["chunk_ids"]) - set(ids) if old else set()
+        manifest.set(key, {
+            "size":      stat["size"],
+            "mtime":     stat["mtime"],
+            "sha256":    stat.get("sha256") or file_sha256(path),
+            "chunk_ids": ids,
+        })
+        # Delete only after the new chunks are in, so search never sees a gap
+        deleted += _delete_stale(vectorstore, manifest, pipeline, key, stale)
+        manifest.save()
+        bump_generation(PG_COLLECTION_NAME)     # expire the app's cached results
+        print(f"  Ingested {key}: {len(ids)} chunks")
+
+    pipeline = EmbeddingPipeline(
+        embeddings=vectorstore.embeddings,
+        vectorstore=vectorstore,
+        checkpoint=checkpoint,
+        controller=AdaptiveController(
+            batch_size=RAG_EMBED_BATCH_SIZE,
+            max_batch=RAG_EMBED_MAX_BATCH,
+            concurrency=RAG_EMBED_CONCURRENCY,
+            max_concurrency=RAG_EMBED_MAX_CONCURRENCY,
+        ),
+        on_file_done=on_file_done,
+        write_queue=RAG_WRITE_QUEUE,
+        # Unchanged sections of an edited file keep their content-hash ID — reuse those rows
+        stored=set() if force else manifest.ids_referenced(),
+    )
+
+    stats_by_key = {key: stat for key, _, stat in pending}
+    parsed_files = stream_files(
+        ((key, path) for key, path, _ in pending),
+        workers=RAG_LOADER_WORKERS,
+        timeout=RAG_PARSE_TIMEOUT,
+    )
+    for parsed in parsed_files:
+        if parsed.error:
+            # Leave the old entry (and its chunks) in place; retried next run
+            print(f"  Warning: could not load {parsed.key}: {parsed.error}")
+            failed += 1
+            continue
+        in_run[parsed.key] = (parsed.path, stats_by_key[parsed.key], parsed.ids)
+        pipeline.add_file(parsed.key, parsed.chunks, parsed.ids)
+
+    stats = pipeline.close()
+
+    for key in removed:
+        entry = manifest.remove(key)
+        deleted += _delete_stale(vectorstore, manifest, pipeline, key, set(entry["chunk_ids"]))
+        manifest.save()
+        print(f"  Removed {key}: {len(entry['chunk_ids'])} chunk(s) released")
+    if removed:
+        bump_generation(PG_COLLECTION_NAME)
+
+    failed += len(stats.failed_files)
+    if not stats.failed_files:
+        checkpoint.clear()
+
+    # Built after the bulk load — far cheaper than maintaining it row by row
+    print("\nMaintaining ANN and metadata indexes...")
+    ensure_indexes()
+
+    print(
+        f"\nIngest complete for '{PG_COLLECTION_NAME}'.\n"
+        f"  Files:  {len(pending) - failed} ingested, {len(unchanged)} skipped (unchanged), "
+        f"{len(removed)} removed, {failed} failed\n"
+        f"  Chunks: {stats.embedded} embedded, {skipped_chunks + stats.resumed + stats.shared + stats.stored} skipped, {deleted} deleted\n"
+        f"  Embed:  {stats.batches} batches, {stats.retries} retries, "
+        f"{pipeline.controller.throttles} throttled; final batch size "
+        f"{pipeline.controller.batch_size}, concurrency {pipeline.controller.concurrency}"
+    )
+    if stats.failed_files:
+        print("  Failed files are retried on the next run (checkpoint kept): "
+              + ", ".join(sorted(stats.failed_files)))
 
 
 if __name__ == "__main__":
-    run_ingest()
+    parser = argparse.ArgumentParser(description="Ingest runbooks into pgvector.")
+    parser.add_argument("--full", action="store_true",
+                        help="Re-embed every file, ignoring the manifest")
+    run_ingest(force=parser.parse_args().full)
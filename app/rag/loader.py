@@ -0,0 +1,246 @@
+"""
+Runbook loading and chunking — serial helpers plus a streaming parallel loader.
+
+stream_files() parses files in a process pool (PyPDF is pure Python and
+CPU-bound, so threads would serialise on the GIL) and yields one
+ParsedFile at a time. At most `workers` files are in flight, so memory
+stays bounded by the largest few files rather than the whole corpus, and
+the consumer (the embedding pipeline) applies backpressure simply by not
+pulling the next item.
+
+Each parse runs under a SIGALRM timer in the worker, so one pathological
+PDF fails with ParseTimeout instead of stalling the run. A worker stuck
+where the timer cannot reach it (inside C code) is caught by the parent:
+every file's deadline counts from its submission — with no more files in
+flight than workers, that is when its parse starts — and a file past it
+gets the pool's processes terminated and a fresh pool, on which the other
+unfinished files are restarted.
+"""
+
+import hashlib
+import multiprocessing
+import os
+import signal
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from langchain_community.document_loaders import PyPDFLoader, TextLoader
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from langchain_core.documents import Document
+
+from config import RAG_CHUNK_SIZE, RAG_CHUNK_OVERLAP
+
+EXTENSIONS = (".pdf", ".md", ".txt")
+
+# Tried in order by RecursiveCharacterTextSplitter — paragraph, line, sentence, word
+CHUNK_SEPARATORS = ["\n\n", "\n", ". ", " ", ""]
+
+# Parent-side slack on top of the in-worker timer, for pickling / scheduling
+PARSE_TIMEOUT_GRACE = 30.0
+
+
+class ParseTimeout(Exception):
+    """A single file took longer than the per-file parse timeout."""
+
+
+@dataclass
+class ParsedFile:
+    key:    str
+    path:   Path
+    chunks: list[Document]
+    ids:    list[str]
+    pages:  int = 0
+    error:  Exception | None = None
+
+
+# ── Serial helpers ─────────────────────────────────────────────────────────────
+
+def find_runbooks(directory: str) -> list[Path]:
+    """Recursively list all .pdf, .md and .txt files, sorted for stable order."""
+    base = Path(directory)
+    return sorted(
+        path for path in base.rglob("*")
+        if path.is_file() and path.suffix.lower() in EXTENSIONS
+    )
+
+
+def load_file(path: Path) -> list[Document]:
+    """
+    Load one runbook file — one Document per PDF page, one per text file.
+    Adds doc_type metadata ("pdf" / "md" / "txt") for search_runbooks filters.
+    """
+    if path.suffix.lower() == ".pdf":
+        docs = PyPDFLoader(str(path)).load()
+    else:
+        docs = TextLoader(str(path), encoding="utf-8").load()
+    for doc in docs:
+        doc.metadata["doc_type"] = path.suffix.lower().lstrip(".")
+    return docs
+
+
+def load_documents(directory: str) -> list[Document]:
+    """
+    Recursively load all .pdf and .md/.txt files from the given directory.
+    Returns a flat list of LangChain Document objects.
+    """
+    docs = []
+
+    if not Path(directory).exists():
+        print(f"Warning: runbooks directory not found at {directory}")
+        return docs
+
+    for path in find_runbooks(directory):
+        try:
+            pages = load_file(path)
+            docs.extend(pages)
+            print(f"  Loaded {len(pages)} page(s) from {path.name}")
+        except Exception as e:
+            print(f"  Warning: could not load {path.name}: {e}")
+
+    return docs
+
+
+def chunk_documents(
+    docs:          list[Document],
+    chunk_size:    int = RAG_CHUNK_SIZE,
+    chunk_overlap: int = RAG_CHUNK_OVERLAP,
+    separators:    list[str] = CHUNK_SEPARATORS,
+) -> tuple[list[Document], list[str]]:
+    """
+    Split documents into overlapping chunks.
+    Returns (chunks, ids) where each id is a stable hash of the content —
+    allowing safe re-ingest without duplicates. Repeated chunks are dropped
+    so one upsert batch never carries the same id twice.
+
+    The splitter parameters default to config; bench/rag_bench.py sweeps them.
+    """
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        separators=separators,
+    )
+
+    # Stable content-hash IDs for idempotent upsert
+    chunks, ids, seen = [], [], set()
+    for chunk in splitter.split_documents(docs):
+        cid = hashlib.md5(chunk.page_content.encode()).hexdigest()
+        if cid not in seen:
+            seen.add(cid)
+            chunks.append(chunk)
+            ids.append(cid)
+    return chunks, ids
+
+
+# ── Parallel streaming loader ──────────────────────────────────────────────────
+
+def _on_alarm(signum, frame):
+    raise ParseTimeout("parse timed out")
+
+
+def _parse_file(path: str, timeout: float) -> tuple[list[Document], list[str], int]:
+    """Worker-process entry point: load + chunk one file under a timer."""
+    signal.signal(signal.SIGALRM, _on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        docs = load_file(Path(path))
+        chunks, ids = chunk_documents(docs)
+        return chunks, ids, len(docs)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+def _new_pool(workers: int) -> ProcessPoolExecutor:
+    # forkserver: the ingest process already runs pipeline threads, and
+    # forking a multi-threaded process can deadlock the child
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("forkserver"),
+                               max_tasks_per_child=50)
+
+
+def _kill_pool(pool: ProcessPoolExecutor):
+    """Stop a pool with a stuck worker — shutdown(wait=True) would block on it forever."""
+    terminate = getattr(pool, "terminate_workers", None)    # Python 3.14+
+    if terminate is not None:
+        terminate()
+    else:
+        for proc in list((pool._processes or {}).values()):
+            proc.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def stream_files(
+    files:   Iterable[tuple[str, Path]],
+    workers: int,
+    timeout: float,
+    parse=_parse_file,
+) -> Iterator[ParsedFile]:
+    """
+    Parse (key, path) pairs in a process pool and yield ParsedFile results
+    in input order. Failures (including timeouts) are yielded with .error
+    set rather than raised, so the caller decides what to skip.
+    parse(path, timeout) is the worker entry point.
+    """
+    workers = max(1, workers or os.cpu_count() or 1)
+    limit   = timeout + PARSE_TIMEOUT_GRACE
+    pending = iter(files)
+    window: deque = deque()     # [key, path, future, submitted_at]
+    pool    = _new_pool(workers)
+
+    def submit(key, path):
+        return [key, path, pool.submit(parse, str(path), timeout), time.monotonic()]
+
+    def submit_next():
+        item = next(pending, None)
+        if item is not None:
+            window.append(submit(*item))
+
+    def restart_pool():
+        # Finished results survive the restart. An unfinished file that has
+        # run longer than its own parse timeout would have been stopped by
+        # its timer by now, so it is stuck too and fails; the rest start over
+        nonlocal pool
+        now      = time.monotonic()
+        finished = [
+            entry[2].done() and not isinstance(entry[2].exception(), BrokenProcessPool)
+            for entry in window
+        ]
+        _kill_pool(pool)
+        pool = _new_pool(workers)
+        for i, entry in enumerate(window):
+            if finished[i]:
+                continue
+            if now - entry[3] >= timeout:
+                expired = Future()
+                expired.set_exception(ParseTimeout(f"no result after {timeout:.0f}s"))
+                entry[2] = expired
+            else:
+                window[i] = submit(entry[0], entry[1])
+
+    try:
+        for _ in range(workers):
+            submit_next()
+
+        while window:
+            key, path, future, submitted = window.popleft()
+            try:
+                chunks, ids, pages = future.result(timeout=max(0.0, submitted + limit - time.monotonic()))
+                result = ParsedFile(key, path, chunks, ids, pages)
+            except TimeoutError:
+                result = ParsedFile(key, path, [], [], error=ParseTimeout(f"no result after {timeout:.0f}s"))
+                restart_pool()
+            except BrokenProcessPool as e:     # a worker died (e.g. crashed in a C extension)
+                result = ParsedFile(key, path, [], [], error=e)
+                restart_pool()
+            except Exception as e:
+                result = ParsedFile(key, path, [], [], error=e)
+            yield result
+            submit_next()
+    finally:
+        if window:
+            _kill_pool(pool)        # closed early: do not wait on parses nobody will read
+        else:
+            pool.shutdown(wait=True)
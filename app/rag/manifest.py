@@ -0,0 +1,73 @@
+"""
+Per-file ingest manifest.
+
+Records, for every runbook file that has been ingested into the collection:
+  path (relative to RUNBOOKS_DIR), size, mtime, sha256 and the chunk IDs
+  written for it.
+
+ingest.py uses it to skip unchanged files (size + mtime, then content hash)
+and to delete the chunks of files that were edited or removed. The file is
+JSON, rewritten atomically after every file so an interrupted run loses at
+most the file in progress.
+"""
+
+import json
+import os
+import tempfile
+from pathlib import Path
+
+MANIFEST_VERSION = 1
+
+
+class Manifest:
+    """Mapping of relative path → entry dict, persisted to a JSON file."""
+
+    def __init__(self, path: str, entries: dict[str, dict] | None = None):
+        self.path    = Path(path)
+        self.entries = entries or {}
+
+    @classmethod
+    def load(cls, path: str) -> "Manifest":
+        """Load the manifest, or start empty if missing / unreadable."""
+        try:
+            data = json.loads(Path(path).read_text())
+        except FileNotFoundError:
+            return cls(path)
+        except (OSError, ValueError) as e:
+            print(f"  Warning: ignoring unreadable manifest {path}: {e}")
+            return cls(path)
+        if data.get("version") != MANIFEST_VERSION:
+            print(f"  Warning: manifest version mismatch in {path} — starting fresh")
+            return cls(path)
+        return cls(path, data.get("files", {}))
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix=".manifest-")
+        with os.fdopen(fd, "w") as f:
+            json.dump({"version": MANIFEST_VERSION, "files": self.entries}, f, indent=1)
+        os.replace(tmp, self.path)
+
+    def get(self, key: str) -> dict | None:
+        return self.entries.get(key)
+
+    def remove(self, key: str) -> dict | None:
+        return self.entries.pop(key, None)
+
+    def ids_referenced(self, exclude: str | None = None) -> set[str]:
+        """
+        Chunk IDs still claimed by any file other than `exclude`.
+        IDs are content hashes, so identical chunks in two files share a row —
+        it may only be deleted once no remaining file references it.
+        """
+        return {
+            cid
+            for key, entry in self.entries.items()
+            if key != exclude
+            for cid in entry.get("chunk_ids", [])
+        }
+
+    # Defined after every annotation that says set[...] — inside the class body
+    # the name would otherwise resolve to this method, not the builtin
+    def set(self, key: str, entry: dict):
+        self.entries[key] = entry
@@ -0,0 +1,344 @@
+"""
+Pipelined, rate-limit-adaptive embedding + upsert for the ingest job.
+
+  producer (ingest.py) ──batches──► embed workers ──bounded queue──► DB writer
+                                     (N concurrent)                  (1 thread)
+
+  - Embedding requests run concurrently; AdaptiveController grows batch size
+    and concurrency additively while OCI answers quickly, and halves both on
+    a 429 or when latency exceeds the target (AIMD).
+  - DB writes overlap with the next embedding batches. The write queue is
+    bounded, so a slow database backs up into the embed workers and then
+    into the producer instead of buffering vectors without limit.
+  - Chunks whose ID the collection already holds (unchanged sections of an
+    edited file) are not embedded again.
+  - Failed batches are retried with backoff. Every written chunk ID is
+    appended to a checkpoint log; a crashed run resumes by skipping those
+    IDs (they are content hashes, so a stored ID means stored content).
+  - A file counts as done only when all its chunks are written — that is
+    when on_file_done fires and ingest.py records it in the manifest.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+from langchain_core.documents import Document
+
+from scheduler import is_rate_limited, backoff_delay
+
+TARGET_LATENCY = 8.0    # seconds per embed call before batches shrink
+THROTTLE_COOLDOWN = 10.0  # seconds without growth after a 429
+
+
+# ── Adaptive batch size / concurrency ──────────────────────────────────────────
+
+class AdaptiveController:
+    """
+    AIMD controller for embed batch size and in-flight requests.
+
+    acquire() / release() bound in-flight embed calls to the *current*
+    concurrency, which moves while the pipeline runs.
+    """
+
+    def __init__(self, batch_size: int, max_batch: int, concurrency: int, max_concurrency: int,
+                 min_batch: int = 8, target_latency: float = TARGET_LATENCY):
+        self.batch_size      = min(batch_size, max_batch)
+        self.max_batch       = max_batch
+        self.min_batch       = min(min_batch, self.batch_size)
+        self.concurrency     = min(concurrency, max_concurrency)
+        self.max_concurrency = max_concurrency
+        self.target_latency  = target_latency
+        self.in_flight       = 0
+        self.throttles       = 0
+        self._successes      = 0
+        self._cooldown_until = 0.0
+        self._cond           = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self.in_flight >= self.concurrency:
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def on_success(self, latency: float):
+        with self._cond:
+            if latency > self.target_latency:
+                self.batch_size = max(self.min_batch, int(self.batch_size * 0.75))
+                return
+            if time.monotonic() < self._cooldown_until:
+                return
+            self._successes += 1
+            if self._successes >= self.concurrency:
+                self._successes  = 0
+                self.concurrency = min(self.max_concurrency, self.concurrency + 1)
+                self.batch_size  = min(self.max_batch, self.batch_size + 8)
+                self._cond.notify_all()
+
+    def on_throttle(self):
+        with self._cond:
+            self.throttles      += 1
+            self._successes      = 0
+            self.concurrency     = max(1, self.concurrency // 2)
+            self.batch_size      = max(self.min_batch, self.batch_size // 2)
+            self._cooldown_until = time.monotonic() + THROTTLE_COOLDOWN
+
+
+# ── Checkpoint log ─────────────────────────────────────────────────────────────
+
+class Checkpoint:
+    """
+    Append-only log of chunk IDs already written to the vector store.
+    A line "-<id>" records that the chunk was deleted again since.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.ids: set[str] = set()
+        if self.path.exists():
+            for line in self.path.read_text().splitlines():
+                line = line.strip()
+                if line.startswith("-"):
+                    self.ids.discard(line[1:])
+                elif line:
+                    self.ids.add(line)
+        self._lock = threading.Lock()
+        self._file = None
+
+    def _append(self, lines: list[str]):
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "a")
+        self._file.write("".join(f"{line}\n" for line in lines))
+        self._file.flush()
+
+    def add(self, ids: list[str]):
+        with self._lock:
+            self._append(ids)
+            self.ids.update(ids)
+
+    def discard(self, ids):
+        """Forget deleted chunks, so a resumed run writes them again instead of skipping them."""
+        with self._lock:
+            gone = [i for i in ids if i in self.ids]
+            if gone:
+                self._append([f"-{i}" for i in gone])
+                self.ids.difference_update(gone)
+
+    def clear(self):
+        """Drop the log once a run finishes with nothing left to resume."""
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+            self.path.unlink(missing_ok=True)
+            self.ids.clear()
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+
+# ── Pipeline ───────────────────────────────────────────────────────────────────
+
+@dataclass
+class _Batch:
+    keys:   list[str]
+    chunks: list[Document]
+    ids:    list[str]
+
+
+@dataclass
+class PipelineStats:
+    embedded:       int = 0
+    resumed:        int = 0   # chunks skipped because the checkpoint had them
+    shared:         int = 0   # chunks skipped because an earlier file this run has the same content
+    stored:         int = 0   # chunks skipped because the collection already has them
+    batches:        int = 0
+    retries:        int = 0
+    failed_batches: int = 0
+    failed_files:   set[str] = field(default_factory=set)
+
+
+class EmbeddingPipeline:
+    """
+    Feed whole files with add_file(); call close() to drain and get stats.
+
+    Args:
+        embeddings:   LangChain Embeddings (embed_documents is called directly)
+        vectorstore:  PGVector — written via add_embeddings
+        checkpoint:   Checkpoint log of already-written IDs
+        controller:   AdaptiveController for batch size / concurrency
+        on_file_done: Called with the file key once all its chunks are written
+        write_queue:  Max embedded batches waiting for the DB writer
+        max_retries:  Attempts per batch for non-throttling errors
+        stored:       IDs already in the collection (from the manifest); their
+                      chunks are claimed but not re-embedded. Call forget() for
+                      IDs deleted during the run.
+    """
+
+    def __init__(self, embeddings, vectorstore, checkpoint: Checkpoint,
+                 controller: AdaptiveController, on_file_done: Callable[[str], None],
+                 write_queue: int = 4, max_retries: int = 5, stored: set[str] | None = None):
+        self.embeddings   = embeddings
+        self.vectorstore  = vectorstore
+        self.checkpoint   = checkpoint
+        self.controller   = controller
+        self.on_file_done = on_file_done
+        self.max_retries  = max_retries
+        self.stats        = PipelineStats()
+        self.claimed_ids: set[str] = set()   # every ID this run intends to keep
+        self.stored_ids = set(stored or ())
+
+        self._buffer: list[tuple[str, Document, str]] = []
+        self._remaining: dict[str, int] = {}
+        self._lock     = threading.RLock()   # on_file_done runs under it and may call forget()
+        self._queue: queue.Queue = queue.Queue(maxsize=write_queue)
+        self._pool     = ThreadPoolExecutor(max_workers=controller.max_concurrency,
+                                            thread_name_prefix="embed")
+        self._writer   = threading.Thread(target=self._write_loop, name="pgvector-writer", daemon=True)
+        self._writer.start()
+
+    # ── producer side ──
+
+    def add_file(self, key: str, chunks: list[Document], ids: list[str]):
+        # IDs are content hashes, so a chunk shared by two files (a common
+        # header, a disclaimer) has one ID. Only the first file to claim it
+        # writes it — a batch with the same ID twice fails the upsert.
+        with self._lock:   # on_file_done reads claimed_ids under the same lock
+            own = []
+            for c, i in zip(chunks, ids):
+                if i not in self.claimed_ids:
+                    self.claimed_ids.add(i)
+                    own.append((c, i))
+            new = [(c, i) for c, i in own if i not in self.stored_ids]
+        todo = [(key, c, i) for c, i in new if i not in self.checkpoint.ids]
+        self.stats.shared  += len(ids) - len(own)
+        self.stats.stored  += len(own) - len(new)
+        self.stats.resumed += len(new) - len(todo)
+
+        if not todo:
+            with self._lock:
+                self._file_done(key)
+            return
+
+        with self._lock:
+            self._remaining[key] = len(todo)
+        self._buffer.extend(todo)
+        while len(self._buffer) >= self.controller.batch_size:
+            self._dispatch(self.controller.batch_size)
+
+    def forget(self, ids):
+        """Chunks deleted from the collection: a later file that has them must embed them again."""
+        with self._lock:
+            self.stored_ids.difference_update(ids)
+        self.checkpoint.discard(ids)
+
+    def _dispatch(self, size: int):
+        items, self._buffer = self._buffer[:size], self._buffer[size:]
+        batch = _Batch([k for k, _, _ in items], [c for _, c, _ in items], [i for _, _, i in items])
+        self.controller.acquire()   # blocks the producer while at the concurrency limit
+        self.stats.batches += 1
+        self._pool.submit(self._embed, batch)
+
+    def close(self) -> PipelineStats:
+        while self._buffer:
+            self._dispatch(self.controller.batch_size)
+        self._pool.shutdown(wait=True)
+        self._queue.put(None)
+        self._writer.join()
+        self.checkpoint.close()
+        return self.stats
+
+    # ── embed workers ──
+
+    def _embed(self, batch: _Batch):
+        try:
+            texts = [c.page_content for c in batch.chunks]
+            attempt = 0
+            while True:
+                start = time.monotonic()
+                try:
+                    vectors = self.embeddings.embed_documents(texts)
+                    self.controller.on_success(time.monotonic() - start)
+                    break
+                except Exception as e:
+                    throttled = is_rate_limited(e)
+                    if throttled:
+                        self.controller.on_throttle()
+                    # 429s are expected under load — allow them more attempts
+                    if attempt >= self.max_retries * (3 if throttled else 1):
+                        print(f"  Error: embedding batch of {len(texts)} failed: {e}")
+                        self._settle(batch, ok=False)
+                        return
+                    with self._lock:
+                        self.stats.retries += 1
+                    time.sleep(backoff_delay(attempt))
+                    attempt += 1
+            self._queue.put((batch, vectors))   # blocks while the writer is behind
+        except Exception as e:
+            print(f"  Error: embedding worker failed: {e}")
+            self._settle(batch, ok=False)
+        finally:
+            self.controller.release()
+
+    # ── DB writer ──
+
+    def _write_loop(self):
+        while (item := self._queue.get()) is not None:
+            batch, vectors = item
+            ok = False
+            for attempt in range(self.max_retries + 1):
+                try:
+                    self.vectorstore.add_embeddings(
+                        texts=[c.page_content for c in batch.chunks],
+                        embeddings=vectors,
+                        metadatas=[c.metadata for c in batch.chunks],
+                        ids=batch.ids,
+                    )
+                    self.checkpoint.add(batch.ids)
+                    ok = True
+                    break
+                except Exception as e:
+                    if attempt >= self.max_retries:
+                        print(f"  Error: writing batch of {len(batch.ids)} failed: {e}")
+                        break
+                    with self._lock:
+                        self.stats.retries += 1
+                    time.sleep(backoff_delay(attempt))
+            # Settled once, outside the retry — a failing on_file_done must not rewrite the batch
+            self._settle(batch, ok=ok)
+
+    def _settle(self, batch: _Batch, ok: bool):
+        with self._lock:
+            if ok:
+                self.stats.embedded += len(batch.ids)
+            else:
+                self.stats.failed_batches += 1
+                self.stats.failed_files.update(batch.keys)
+            for key in batch.keys:
+                self._remaining[key] -= 1
+                if self._remaining[key] == 0:
+                    del self._remaining[key]
+                    if key not in self.stats.failed_files:
+                        self._file_done(key)
+
+    def _file_done(self, key: str):
+        """on_file_done under self._lock; a failure marks the file failed so the next run redoes it."""
+        try:
+            self.on_file_done(key)
+        except Exception as e:
+            # Chunks are written but the manifest is not
+            print(f"  Error: finishing {key} failed: {e}")
+            self.stats.failed_files.add(key)
@@ -1,80 +1,191 @@
 """
 RAG retriever — wraps OCI PostgreSQL PGVector as a LangChain Tool.
 
-The vectorstore connection is cached at the Streamlit server-process level
-(@st.cache_resource) so all user sessions share one DB connection pool.
+The DB engine and the per-collection PGVector stores are cached at the
+Streamlit server-process level (@st.cache_resource) so all user sessions
+share one DB connection pool. The engine sets the ANN query-time knobs
+(hnsw.ef_search / ivfflat.probes) on every connection — see rag/index.py.
+
+With RAG_HYBRID (default) searches combine full-text and vector results —
+see rag/hybrid.py. Query embeddings and final results are cached per
+process (rag/cache.py); ingest invalidates the result cache.
 """
 
+import sqlalchemy
 import streamlit as st
 from langchain_postgres import PGVector
-from langchain_core.tools import Tool
+from langchain_core.tools import StructuredTool
 from langchain_core.documents import Document
 
-from oci_llm import build_embeddings
-from config import PG_CONNECTION_STRING, PG_COLLECTION_NAME, RAG_TOP_K
+from oci_llm import build_embeddings, build_reranker
+from rag.cache import CachedEmbeddings, QueryEmbeddingCache, ResultCache
+from rag.hybrid import hybrid_search
+from rag.index import pg_engine_args
+from config import (
+    PG_CONNECTION_STRING,
+    PG_COLLECTION_NAME,
+    RAG_COLLECTIONS,
+    RAG_TOP_K,
+    RAG_HYBRID,
+    EMBED_DIMENSIONS,
+    EMBED_MODEL_ID,
+    RAG_EMBED_CACHE_SIZE,
+    RAG_EMBED_CACHE_PATH,
+    RAG_RESULT_CACHE_TTL,
+    RAG_RESULT_CACHE_SIZE,
+)
 
 
 @st.cache_resource
-def _get_vectorstore() -> PGVector:
-    """
-    Open the PGVector collection once per server process.
-    Cached — not recreated on every Streamlit re-run or per-user session.
-    """
+def _get_engine() -> sqlalchemy.Engine:
+    """One SQLAlchemy engine (connection pool) shared by every collection."""
     if not PG_CONNECTION_STRING:
         raise ValueError(
             "PG_CONNECTION_STRING is not set. "
             "Run the ingest script after configuring your OCI PostgreSQL connection."
         )
+    return sqlalchemy.create_engine(PG_CONNECTION_STRING, **pg_engine_args())
+
+
+@st.cache_resource
+def _get_embeddings():
+    """OCI embeddings behind the shared query-embedding LRU."""
+    cache = QueryEmbeddingCache(RAG_EMBED_CACHE_SIZE, RAG_EMBED_CACHE_PATH)
+    return CachedEmbeddings(build_embeddings(), cache, EMBED_MODEL_ID)
+
+
+@st.cache_resource
+def _get_result_cache() -> ResultCache:
+    return ResultCache(RAG_RESULT_CACHE_TTL, RAG_RESULT_CACHE_SIZE)
+
+
+@st.cache_resource
+def _get_reranker():
+    return build_reranker()
+
+
+@st.cache_resource
+def _get_vectorstore(collection_name: str = PG_COLLECTION_NAME) -> PGVector:
+    """
+    Open a PGVector collection once per server process.
+    Cached — not recreated on every Streamlit re-run or per-user session.
+    """
     return PGVector(
-        embeddings=build_embeddings(),
-        collection_name=PG_COLLECTION_NAME,
-        connection=PG_CONNECTION_STRING,
+        embeddings=_get_embeddings(),
+        collection_name=collection_name,
+        connection=_get_engine(),
         use_jsonb=True,
+        embedding_length=EMBED_DIMENSIONS,
     )
 
 
-def build_rag_tool() -> Tool:
+def warm_up():
+    """
+    Open the DB pool, embeddings client and every configured collection
+    ahead of the first search (PGVector creates its tables and collection
+    row on construction). Called from the app's startup bootstrap.
+    """
+    _get_engine()
+    _get_reranker()
+    for name in RAG_COLLECTIONS:
+        _get_vectorstore(name)
+
+
+def build_filter(source: str | None = None, doc_type: str | None = None) -> dict | None:
+    """
+    Translate tool arguments into a langchain-postgres metadata filter.
+    $ilike on source is served by the trigram index, $in on doc_type by the
+    (cmetadata->>'doc_type') expression index.
+    """
+    flt = {}
+    if source:
+        flt["source"] = {"$ilike": f"%{source}%"}
+    if doc_type:
+        flt["doc_type"] = {"$in": [doc_type.lower().lstrip(".")]}
+    return flt or None
+
+
+def format_results(docs: list[Document]) -> str:
+    """Render retrieved chunks with their source citation for the LLM."""
+    if not docs:
+        return "No relevant runbook content found for this query."
+
+    results = []
+    for i, doc in enumerate(docs, 1):
+        source = doc.metadata.get("source", "unknown")
+        page   = doc.metadata.get("page", "")
+        loc    = f" (page {page + 1})" if isinstance(page, int) else ""
+        results.append(f"[Source {i}: {source}{loc}]\n{doc.page_content}")
+
+    return "\n\n---\n\n".join(results)
+
+
+def build_rag_tool(vectorstore=None) -> StructuredTool:
     """
     Build and return the search_runbooks LangChain Tool.
     This tool is passed to the LangGraph agent alongside MCP vCenter tools.
 
     The description is what the LLM reads to decide when to call this tool —
     keep it precise and distinct from vCenter tool descriptions.
+
+    Args:
+        vectorstore: Any LangChain VectorStore — defaults to the shared PGVector
+                     collections. The offline bench harnesses pass an in-memory
+                     one (metadata filters then do not apply).
     """
-    vectorstore = _get_vectorstore()
-    retriever   = vectorstore.as_retriever(search_kwargs={"k": RAG_TOP_K})
 
-    def search_runbooks(query: str) -> str:
+    def search_runbooks(
+        query: str,
+        source: str | None = None,
+        doc_type: str | None = None,
+        collection: str | None = None,
+    ) -> str:
         """
         Search the vCenter operational runbooks and documentation.
         Returns relevant excerpts from runbooks, procedures, and guides.
         """
         try:
-            docs: list[Document] = retriever.invoke(query)
+            if vectorstore is not None:
+                docs = hybrid_search(vectorstore, query, RAG_TOP_K)
+            else:
+                name = collection or RAG_COLLECTIONS[0]
+                if name not in RAG_COLLECTIONS:
+                    return f"Unknown collection '{name}'. Available: {', '.join(RAG_COLLECTIONS)}"
+                cache = _get_result_cache()
+                key   = cache.key(name, query, RAG_TOP_K, source=source, doc_type=doc_type)
+                gen   = cache.generation(key)     # before the search: an ingest mid-search must expire it
+                docs  = cache.get(key, gen)
+                if docs is not None:
+                    return format_results(docs)
+                docs = hybrid_search(
+                    _get_vectorstore(name),
+                    query,
+                    RAG_TOP_K,
+                    engine=_get_engine() if RAG_HYBRID else None,
+                    collection=name,
+                    flt=build_filter(source, doc_type),
+                    source=source,
+                    doc_type=doc_type,
+                    reranker=_get_reranker(),
+                )
+                cache.put(key, docs, gen)
         except Exception as e:
             return f"Runbook search unavailable: {e}"
 
-        if not docs:
-            return "No relevant runbook content found for this query."
+        return format_results(docs)
 
-        results = []
-        for i, doc in enumerate(docs, 1):
-            source = doc.metadata.get("source", "unknown")
-            page   = doc.metadata.get("page", "")
-            loc    = f" (page {page + 1})" if isinstance(page, int) else ""
-            results.append(f"[Source {i}: {source}{loc}]\n{doc.page_content}")
-
-        return "\n\n---\n\n".join(results)
-
-    return Tool(
-        name="search_runbooks",
+    return StructuredTool.from_function(
         func=search_runbooks,
+        name="search_runbooks",
         description=(
             "Search the vCenter operational runbooks, procedures, and documentation. "
             "Use this for questions about DR procedures, troubleshooting steps, "
             "SLAs, maintenance windows, escalation paths, or any operational guidance. "
             "For live vCenter state (power status, resource usage, alarms), "
             "use the vCenter tools instead. "
-            "Input: a natural language query about vCenter operations or procedures."
+            "Input: query — a natural language query about vCenter operations or procedures. "
+            "Optional filters: source (part of a runbook file name or path), "
+            "doc_type ('pdf', 'md' or 'txt'), "
+            f"collection (one of: {', '.join(RAG_COLLECTIONS)})."
         ),
     )
@@ -0,0 +1,342 @@
+"""
+Agent execution scheduler — bounded, fair and backpressured.
+
+Every browser session shares one agent (built once per process by bootstrap.py).
+Rather than each Streamlit script thread calling invoke_agent directly,
+chat turns are submitted here:
+
+  - A fixed pool of worker threads runs turns (AGENT_WORKERS)
+  - Each user has their own FIFO and workers serve users round-robin, so one
+    operator firing off ten questions cannot starve everyone else
+  - Submissions past AGENT_QUEUE_MAX (global) or AGENT_USER_QUEUE_MAX
+    (per user) raise SchedulerBusy instead of queueing without bound
+  - ConcurrencyLimiter caps in-flight LLM and MCP calls across all workers,
+    and retry_rate_limited backs off on OCI 429 / throttling errors
+
+Stdlib only — imported by the Streamlit entry point before any heavy imports.
+"""
+
+import asyncio
+import itertools
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable
+
+from bench.metrics import percentile
+from config import (
+    LLM_MAX_CONCURRENCY,
+    MCP_MAX_CONCURRENCY,
+    LLM_MAX_RETRIES,
+    LLM_RETRY_BASE_DELAY,
+)
+
+
+class SchedulerBusy(Exception):
+    """Raised when a turn cannot be queued because a queue limit is reached."""
+
+
+# ── Rate-limit-aware retry ─────────────────────────────────────────────────────
+
+def is_rate_limited(exc: BaseException) -> bool:
+    """
+    True for OCI GenAI throttling errors.
+    oci.exceptions.ServiceError carries .status; HTTP clients use .status_code.
+    """
+    for attr in ("status", "status_code"):
+        if getattr(exc, attr, None) == 429:
+            return True
+    text = str(exc).lower()
+    return "429" in text or "toomanyrequests" in text or "throttl" in text
+
+
+def backoff_delay(attempt: int, base: float = LLM_RETRY_BASE_DELAY, cap: float = 30.0) -> float:
+    """Exponential backoff with full jitter (attempt is 0-based)."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def retry_rate_limited(fn: Callable[[], Any], max_retries: int = LLM_MAX_RETRIES) -> Any:
+    """Call fn(), retrying with backoff while it raises a rate-limit error."""
+    for attempt in itertools.count():
+        try:
+            return fn()
+        except Exception as e:
+            if attempt >= max_retries or not is_rate_limited(e):
+                raise
+            time.sleep(backoff_delay(attempt))
+
+
+async def aretry_rate_limited(fn: Callable[[], Any], max_retries: int = LLM_MAX_RETRIES) -> Any:
+    """Async variant of retry_rate_limited — fn returns an awaitable."""
+    for attempt in itertools.count():
+        try:
+            return await fn()
+        except Exception as e:
+            if attempt >= max_retries or not is_rate_limited(e):
+                raise
+            await asyncio.sleep(backoff_delay(attempt))
+
+
+# ── Global concurrency limits ──────────────────────────────────────────────────
+
+class ConcurrencyLimiter:
+    """
+    Process-wide cap on in-flight calls, usable from threads and event loops.
+
+    Each agent turn runs in its own asyncio.run() loop on a worker thread, so
+    an asyncio.Semaphore would not be shared. Instead, waiters from every
+    thread and loop join one FIFO and a release hands its slot straight to
+    the next of them — a threading.Event for threads, a future resolved via
+    call_soon_threadsafe for coroutines — so nothing polls.
+    """
+
+    def __init__(self, name: str, limit: int):
+        self.name      = name
+        self.limit     = limit
+        self._free     = limit
+        self._waiters: deque[Callable[[], None]] = deque()
+        self._lock     = threading.Lock()
+        self.in_flight = 0
+        self.peak      = 0
+
+    def _grant_locked(self):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+
+    def _release(self):
+        with self._lock:
+            self.in_flight -= 1
+            if not self._waiters:
+                self._free += 1
+                return
+            self._grant_locked()        # the slot passes to the waiter as-is
+            wake = self._waiters.popleft()
+        wake()
+
+    def __enter__(self):
+        with self._lock:
+            if self._free > 0:
+                self._free -= 1
+                self._grant_locked()
+                return self
+            granted = threading.Event()
+            self._waiters.append(granted.set)
+        granted.wait()
+        return self
+
+    def __exit__(self, *exc):
+        self._release()
+
+    async def __aenter__(self):
+        loop = asyncio.get_running_loop()
+        fut  = loop.create_future()
+
+        def grant(fut=fut):
+            # On the waiter's loop: a waiter cancelled after the hand-off
+            # passes the slot on instead of leaking it
+            if fut.cancelled():
+                self._release()
+            else:
+                fut.set_result(None)
+
+        def wake():
+            try:
+                loop.call_soon_threadsafe(grant)
+            except RuntimeError:        # the waiter's loop has closed
+                self._release()
+
+        with self._lock:
+            if self._free > 0:
+                self._free -= 1
+                self._grant_locked()
+                return self
+            self._waiters.append(wake)
+        try:
+            await fut
+        except asyncio.CancelledError:
+            with self._lock:
+                queued = wake in self._waiters
+                if queued:
+                    self._waiters.remove(wake)
+            if not queued and fut.done() and not fut.cancelled():
+                self._release()         # granted, but cancelled before resuming
+            raise
+        return self
+
+    async def __aexit__(self, *exc):
+        self._release()
+
+
+llm_limiter = ConcurrencyLimiter("llm", LLM_MAX_CONCURRENCY)
+mcp_limiter = ConcurrencyLimiter("mcp", MCP_MAX_CONCURRENCY)
+
+
+# ── Scheduler ──────────────────────────────────────────────────────────────────
+
+class Ticket:
+    """Handle for one submitted turn. wait() blocks until it has run."""
+
+    def __init__(self, user_id: str, fn: Callable, args: tuple):
+        self.user_id      = user_id
+        self.fn           = fn
+        self.args         = args
+        self.submitted_at = time.monotonic()
+        self.started_at:  float | None = None
+        self.finished_at: float | None = None
+        self.result:      Any = None
+        self.error:       BaseException | None = None
+        self.cancelled    = False
+        self._done        = threading.Event()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        return self._done.wait(timeout)
+
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def get(self) -> Any:
+        """Block until finished; return the result or re-raise the error."""
+        self._done.wait()
+        if self.error:
+            raise self.error
+        return self.result
+
+
+class AgentScheduler:
+    """
+    Fixed worker pool with per-user FIFOs served round-robin.
+
+    Args:
+        workers:        Turns executed concurrently
+        queue_max:      Queued (not yet running) turns across all users
+        user_queue_max: Queued turns per user
+    """
+
+    WINDOW = 500   # recent samples kept for wait / run-time percentiles
+
+    def __init__(self, workers: int, queue_max: int, user_queue_max: int):
+        self.workers        = workers
+        self.queue_max      = queue_max
+        self.user_queue_max = user_queue_max
+
+        self._cond    = threading.Condition()
+        self._queues: OrderedDict[str, deque[Ticket]] = OrderedDict()
+        self._queued  = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected  = 0
+        self._waits_ms: deque[float] = deque(maxlen=self.WINDOW)
+        self._runs_ms:  deque[float] = deque(maxlen=self.WINDOW)
+
+        for i in range(workers):
+            threading.Thread(target=self._worker, name=f"agent-worker-{i}", daemon=True).start()
+
+    def submit(self, user_id: str, fn: Callable, *args) -> Ticket:
+        """Queue fn(*args) for user_id. Raises SchedulerBusy when full."""
+        ticket = Ticket(user_id, fn, args)
+        with self._cond:
+            user_q = self._queues.get(user_id)
+            if user_q is not None and len(user_q) >= self.user_queue_max:
+                self._rejected += 1
+                raise SchedulerBusy(
+                    f"You already have {len(user_q)} requests waiting — "
+                    "please wait for them to finish."
+                )
+            if self._queued >= self.queue_max:
+                self._rejected += 1
+                raise SchedulerBusy("The assistant is at capacity — please retry in a minute.")
+            self._queues.setdefault(user_id, deque()).append(ticket)
+            self._queued += 1
+            self._cond.notify()
+        return ticket
+
+    def cancel(self, ticket: Ticket) -> bool:
+        """Drop a ticket that has not started yet. Returns True if removed."""
+        with self._cond:
+            user_q = self._queues.get(ticket.user_id)
+            if not user_q or ticket not in user_q:
+                return False
+            user_q.remove(ticket)
+            if not user_q:
+                del self._queues[ticket.user_id]
+            self._queued -= 1
+        ticket.cancelled = True
+        ticket._done.set()
+        return True
+
+    def position(self, ticket: Ticket) -> int:
+        """
+        1-based number of turns that will start before and including this one
+        under round-robin service; 0 once it is running or finished.
+        """
+        with self._cond:
+            user_q = self._queues.get(ticket.user_id)
+            if not user_q or ticket not in user_q:
+                return 0
+            k = user_q.index(ticket)
+            users = list(self._queues)
+            u = users.index(ticket.user_id)
+            ahead = k
+            for i, other in enumerate(users):
+                if other != ticket.user_id:
+                    ahead += min(len(self._queues[other]), k + (1 if i < u else 0))
+            return ahead + 1
+
+    def _next_ticket(self) -> Ticket:
+        # Caller holds self._cond. Serve the user at the head of the rotation,
+        # then move them to the back if they still have work queued.
+        user_id, user_q = next(iter(self._queues.items()))
+        ticket = user_q.popleft()
+        if user_q:
+            self._queues.move_to_end(user_id)
+        else:
+            del self._queues[user_id]
+        self._queued -= 1
+        return ticket
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._queues:
+                    self._cond.wait()
+                ticket = self._next_ticket()
+                self._running += 1
+
+            ticket.started_at = time.monotonic()
+            try:
+                ticket.result = ticket.fn(*ticket.args)
+            except BaseException as e:
+                ticket.error = e
+            ticket.finished_at = time.monotonic()
+
+            with self._cond:
+                self._running -= 1
+                self._completed += 1
+                self._waits_ms.append((ticket.started_at - ticket.submitted_at) * 1000)
+                self._runs_ms.append((ticket.finished_at - ticket.started_at) * 1000)
+            ticket._done.set()
+
+    def metrics(self) -> dict:
+        """Point-in-time queue depth, utilisation and recent wait / run times."""
+        def pct(values, p):
+            return round(percentile(values, p), 1)
+
+        with self._cond:
+            waits, runs = list(self._waits_ms), list(self._runs_ms)
+            return {
+                "queue_depth":     self._queued,
+                "queued_users":    len(self._queues),
+                "running":         self._running,
+                "workers":         self.workers,
+                "completed":       self._completed,
+                "rejected":        self._rejected,
+                "wait_p50_ms":     pct(waits, 50),
+                "wait_p95_ms":     pct(waits, 95),
+                "run_p50_ms":      pct(runs, 50),
+                "run_p95_ms":      pct(runs, 95),
+                "llm_in_flight":   llm_limiter.in_flight,
+                "llm_peak":        llm_limiter.peak,
+                "mcp_in_flight":   mcp_limiter.in_flight,
+                "mcp_peak":        mcp_limiter.peak,
+            }
@@ -3,17 +3,29 @@ Enterprise vCenter AI Assistant — Streamlit chat UI.
 
 Accessible from any browser. No Claude Desktop required.
 Powered by OCI GenAI (Cohere Command A) + LangChain + vCenter MCP tools + RAG.
+
+The page renders before the agent exists: bootstrap.py warms the MCP
+tools, the GenAI client and the vector store in the background, and the
+chat input stays disabled until they are ready.
 """
 
 import os
+import uuid
 import streamlit as st
 import nest_asyncio
 
 # Must be applied before any async operations (Tornado event loop is already running)
 nest_asyncio.apply()
 
-from agent import get_mcp_tools, build_agent, invoke_agent
-from config import APP_TITLE, MAX_CHAT_HISTORY
+from bootstrap import Bootstrap, READY, FAILED, RUNNING
+from scheduler import AgentScheduler, SchedulerBusy
+from config import (
+    APP_TITLE,
+    MAX_CHAT_HISTORY,
+    AGENT_WORKERS,
+    AGENT_QUEUE_MAX,
+    AGENT_USER_QUEUE_MAX,
+)
 
 # ── Page config ────────────────────────────────────────────────────────────────
 st.set_page_config(
@@ -25,19 +37,23 @@ st.set_page_config(
 
 # ── Agent initialisation (once per server process, shared across all sessions) ─
 
-@st.cache_resource(show_spinner="Connecting to vCenter MCP server...")
-def get_agent():
+@st.cache_resource
+def get_bootstrap() -> Bootstrap:
     """
-    Build the LangGraph agent once per server process.
-    Fetches MCP tool schemas from the running mcp_server container.
-    Returns (agent, error_message).
+    Start building the LangGraph agent once per server process, in the
+    background. Callers poll .ready / .error instead of blocking the render.
     """
-    try:
-        mcp_tools = get_mcp_tools()
-        agent     = build_agent(mcp_tools)
-        return agent, None
-    except Exception as e:
-        return None, str(e)
+    return Bootstrap().start()
+
+
+@st.cache_resource
+def get_scheduler() -> AgentScheduler:
+    """One bounded worker pool per server process, shared by all sessions."""
+    return AgentScheduler(
+        workers=AGENT_WORKERS,
+        queue_max=AGENT_QUEUE_MAX,
+        user_queue_max=AGENT_USER_QUEUE_MAX,
+    )
 
 
 # ── Session state ──────────────────────────────────────────────────────────────
@@ -45,6 +61,8 @@ def get_agent():
 def init_session():
     if "messages" not in st.session_state:
         st.session_state.messages = []   # [{"role": "user"|"assistant", "content": str}]
+    if "user_id" not in st.session_state:
+        st.session_state.user_id = uuid.uuid4().hex   # scheduler fairness key
 
 
 # ── Sidebar ────────────────────────────────────────────────────────────────────
@@ -81,6 +99,89 @@ def render_sidebar():
             st.session_state.messages = []
             st.rerun()
 
+        with st.expander("Startup"):
+            boot  = get_bootstrap()
+            lines = [f"{c.label}: {c.state} ({c.seconds:.1f}s)" for c in boot.status()]
+            if boot.ready:
+                lines.append(f"Agent ready in {boot.total:.1f}s")
+            st.caption("  \n".join(lines))
+
+        with st.expander("Scheduler"):
+            m = get_scheduler().metrics()
+            st.caption(
+                f"Queue depth: {m['queue_depth']} ({m['queued_users']} users)  \n"
+                f"Running: {m['running']}/{m['workers']}  \n"
+                f"Wait p50/p95: {m['wait_p50_ms']:.0f}/{m['wait_p95_ms']:.0f} ms  \n"
+                f"LLM in flight: {m['llm_in_flight']} · MCP in flight: {m['mcp_in_flight']}  \n"
+                f"Rejected: {m['rejected']}"
+            )
+
+
+# ── Agent turn via scheduler ───────────────────────────────────────────────────
+
+def run_turn(agent, user_input: str, history_pairs: list[tuple[str, str]]) -> str:
+    """
+    Queue the turn on the shared scheduler and show the user's queue position
+    until a worker picks it up. If the script is interrupted (user navigates
+    away or reruns) a still-queued turn is cancelled rather than run.
+    """
+    from agent import invoke_agent
+
+    scheduler = get_scheduler()
+    try:
+        ticket = scheduler.submit(
+            st.session_state.user_id, invoke_agent, agent, user_input, history_pairs
+        )
+    except SchedulerBusy as e:
+        return f"⚠️ {e}"
+
+    status = st.empty()
+    try:
+        while not ticket.wait(timeout=0.5):
+            position = scheduler.position(ticket)
+            if position:
+                status.info(f"⏳ Queued — position {position}")
+            else:
+                status.info("Thinking...")
+    finally:
+        scheduler.cancel(ticket)
+        status.empty()
+
+    try:
+        return ticket.get()
+    except Exception as e:
+        return f"⚠️ Agent error: {e}"
+
+
+# ── Warm-up status ─────────────────────────────────────────────────────────────
+
+STATE_ICONS = {READY: "✅", FAILED: "❌", RUNNING: "⏳"}
+
+
+def render_warmup(boot: Bootstrap):
+    """Show per-component start-up progress; offer a retry once it has failed."""
+    if boot.error and not boot.busy:
+        st.error(f"**Failed to start the assistant**\n\n{boot.error}")
+        st.info(
+            "Ensure the `mcp_server` container is running and healthy.\n"
+            "Check: `docker compose ps` and `docker compose logs mcp_server`"
+        )
+        if st.button("🔄 Retry"):
+            boot.retry()
+            st.rerun()
+        return
+    st.info("Warming up — " + " · ".join(
+        f"{STATE_ICONS.get(c.state, '…')} {c.label}" for c in boot.status()
+    ))
+
+
+@st.fragment(run_every=1.0)
+def watch_warmup(boot: Bootstrap):
+    """Refresh only the warm-up status while the bootstrap thread runs; rerun the page once it is done."""
+    if not boot.busy:
+        st.rerun()
+    render_warmup(boot)
+
 
 # ── Main UI ────────────────────────────────────────────────────────────────────
 
@@ -90,21 +191,22 @@ def main():
 
     st.title(f"🖥️ {APP_TITLE}")
 
-    # Load agent (cached — no rebuild on re-run)
-    agent, error = get_agent()
-    if error:
-        st.error(f"**Failed to connect to vCenter MCP server**\n\n{error}")
-        st.info(
-            "Ensure the `mcp_server` container is running and healthy.\n"
-            "Check: `docker compose ps` and `docker compose logs mcp_server`"
-        )
-        st.stop()
+    # Agent is built in the background (cached — started once per process)
+    boot = get_bootstrap()
+    if boot.busy:
+        watch_warmup(boot)
+    elif not boot.ready:
+        render_warmup(boot)
 
     # Render existing chat history
     for msg in st.session_state.messages:
         with st.chat_message(msg["role"]):
             st.markdown(msg["content"])
 
+    if not boot.ready:
+        st.chat_input("Connecting to vCenter and OCI GenAI...", disabled=True)
+        return
+
     # Chat input
     if user_input := st.chat_input("Ask about your vCenter environment or runbooks..."):
 
@@ -119,14 +221,9 @@ def main():
             for m in st.session_state.messages[-(MAX_CHAT_HISTORY + 1):-1]
         ]
 
-        # Invoke agent
+        # Invoke agent through the shared scheduler
         with st.chat_message("assistant"):
-            with st.spinner("Thinking..."):
-                try:
-                    response = invoke_agent(agent, user_input, history_pairs)
-                except Exception as e:
-                    response = f"⚠️ Agent error: {e}"
-
+            response = run_turn(boot.agent, user_input, history_pairs)
             st.markdown(response)
 
         st.session_state.messages.append({"role": "assistant", "content": response})
@@ -0,0 +1,9 @@
+import os
+import sys
+from pathlib import Path
+
+# Modules import each other flat from app/, as under `streamlit run`
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+# config.py fails fast without these — nothing here talks to OCI
+os.environ.setdefault("COMPARTMENT_ID", "ocid1.compartment.oc1..offline-test")
+os.environ.setdefault("OCI_AUTH_TYPE", "api_key")
@@ -0,0 +1,48 @@
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import bootstrap
+from bootstrap import FAILED, READY, Bootstrap
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_retry_while_running_leaves_the_run_alone(monkeypatch):
+    release, attempts = threading.Event(), []
+
+    def flaky_mcp():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ConnectionError("mcp_server not up yet")
+        return ["tool"]
+
+    monkeypatch.setitem(bootstrap.LOADERS, "mcp", ("MCP", True, flaky_mcp))
+    monkeypatch.setitem(bootstrap.LOADERS, "llm", ("LLM", True, lambda: release.wait(5) and "llm"))
+    monkeypatch.setitem(bootstrap.LOADERS, "rag", ("RAG", False, lambda: None))
+    monkeypatch.setitem(sys.modules, "agent", SimpleNamespace(build_agent=lambda tools, llm: (tools, llm)))
+
+    boot = Bootstrap().start()
+    wait_for(lambda: boot.components["mcp"].state == FAILED)
+    thread = boot._thread
+
+    boot.retry()                                   # a second session presses Retry mid-run
+    assert boot._thread is thread
+    assert boot.components["mcp"].state == FAILED  # not reset under the running thread
+
+    release.set()
+    wait_for(lambda: not boot.busy)
+    assert boot.error and not boot.ready
+
+    boot.retry()
+    assert boot.components["mcp"].state != FAILED
+    wait_for(lambda: not boot.busy)
+    assert boot.agent == (["tool"], "llm")
+    assert len(attempts) == 2
+    assert all(c.state == READY for c in boot.status())
@@ -0,0 +1,41 @@
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from rag import cache as rag_cache  # noqa: E402
+from rag.cache import ResultCache, bump_generation  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def state_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(rag_cache, "INGEST_STATE_DIR", str(tmp_path))
+
+
+def test_hit_while_generation_unchanged():
+    cache = ResultCache(ttl=60, maxsize=8)
+    key   = cache.key("runbooks", "DR  Procedure", 5)
+    gen   = cache.generation(key)
+    assert cache.get(key, gen) is None
+    cache.put(key, ["doc"], gen)
+    assert cache.get(cache.key("runbooks", "dr procedure", 5)) == ["doc"]
+
+
+def test_ingest_during_search_is_not_cached_as_fresh():
+    cache = ResultCache(ttl=60, maxsize=8)
+    key   = cache.key("runbooks", "dr procedure", 5)
+    gen   = cache.generation(key)
+    assert cache.get(key, gen) is None
+
+    bump_generation("runbooks")          # ingest finishes while the search runs
+    cache.put(key, ["old doc"], gen)
+
+    assert cache.get(key) is None
+
+
+def test_bumps_within_one_timestamp_tick_still_change_the_token(monkeypatch):
+    monkeypatch.setattr(rag_cache.time, "time_ns", lambda: 1_000)     # frozen clock
+    seen = {rag_cache.collection_generation("runbooks")}
+    for _ in range(3):
+        bump_generation("runbooks")
+        seen.add(rag_cache.collection_generation("runbooks"))
+    assert len(seen) == 4
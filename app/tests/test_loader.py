@@ -0,0 +1,63 @@
+import signal
+import time
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("langchain_community")
+
+from rag import loader  # noqa: E402
+from rag.loader import ParseTimeout, stream_files  # noqa: E402
+
+
+# Worker entry points — module level so the forkserver children can import them
+
+def _echo(path: str, timeout: float):
+    if "slow" in path:
+        time.sleep(0.5)
+    return [], [path], 1
+
+
+def _hang_in_c(path: str, timeout: float):
+    if "hang" in path:
+        signal.signal(signal.SIGALRM, signal.SIG_IGN)    # like a C loop the timer cannot interrupt
+        time.sleep(60)
+    return [], [path], 1
+
+
+def run(names, parse, workers=2, timeout=5.0):
+    files = [(name, Path(name)) for name in names]
+    return list(stream_files(files, workers=workers, timeout=timeout, parse=parse))
+
+
+@pytest.fixture(autouse=True)
+def short_grace(monkeypatch):
+    monkeypatch.setattr(loader, "PARSE_TIMEOUT_GRACE", 0.5)
+
+
+def test_results_in_input_order():
+    results = run(["slow-a", "b", "c", "slow-d", "e"], _echo)
+    assert [r.key for r in results] == ["slow-a", "b", "c", "slow-d", "e"]
+    assert all(r.error is None and r.ids == [r.key] for r in results)
+
+
+def test_stuck_worker_is_killed_and_the_run_continues():
+    start   = time.monotonic()
+    results = run(["a", "hang", "b", "c", "d"], _hang_in_c)
+    elapsed = time.monotonic() - start
+
+    assert [r.key for r in results] == ["a", "hang", "b", "c", "d"]
+    assert isinstance(results[1].error, ParseTimeout)
+    assert all(r.error is None for i, r in enumerate(results) if i != 1)
+    assert elapsed < 10     # neither the parse nor pool shutdown waited out the 60 s hang
+
+
+def test_deadline_counts_from_submission_not_from_waiting():
+    # Both hung files start together, so both expire at the first deadline —
+    # not one after the other
+    start   = time.monotonic()
+    results = run(["hang-1", "hang-2", "a"], _hang_in_c, timeout=6.0)
+    elapsed = time.monotonic() - start
+
+    assert [type(r.error) for r in results] == [ParseTimeout, ParseTimeout, type(None)]
+    assert elapsed < 2 * (6.0 + loader.PARSE_TIMEOUT_GRACE)
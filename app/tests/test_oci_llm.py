@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("langchain_community")
+
+from langchain_core.callbacks import BaseCallbackHandler  # noqa: E402
+from langchain_core.language_models.chat_models import BaseChatModel  # noqa: E402
+from langchain_core.messages import AIMessage  # noqa: E402
+from langchain_core.outputs import ChatGeneration, ChatResult  # noqa: E402
+
+from oci_llm import ThrottledChatModel  # noqa: E402
+from scheduler import ConcurrencyLimiter  # noqa: E402
+
+
+class TokenModel(BaseChatModel):
+    """Reports one token through its run manager, like a streaming provider."""
+
+    @property
+    def _llm_type(self) -> str:
+        return "token"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        if run_manager:
+            run_manager.on_llm_new_token("hi")
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="hi"))])
+
+
+class Recorder(BaseCallbackHandler):
+    def __init__(self):
+        self.events = []
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self.events.append("start")
+
+    def on_llm_new_token(self, token, **kwargs):
+        self.events.append(f"token:{token}")
+
+    def on_llm_end(self, response, **kwargs):
+        self.events.append("end")
+
+
+def throttled(**kwargs):
+    return ThrottledChatModel(limiter=ConcurrencyLimiter("test", 1), **kwargs)
+
+
+def test_inner_events_reach_config_callbacks():
+    recorder = Recorder()
+    throttled(inner=TokenModel()).invoke("hello", config={"callbacks": [recorder]})
+    assert recorder.events == ["start", "token:hi", "end"]
+
+
+def test_async_inner_events_reach_config_callbacks():
+    recorder = Recorder()
+    asyncio.run(throttled(inner=TokenModel()).ainvoke("hello", config={"callbacks": [recorder]}))
+    assert recorder.events == ["start", "token:hi", "end"]
+
+
+def test_inherits_inner_model_callbacks():
+    recorder = Recorder()
+    throttled(inner=TokenModel(callbacks=[recorder])).invoke("hello")
+    assert recorder.events == ["start", "token:hi", "end"]
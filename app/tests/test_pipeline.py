@@ -0,0 +1,142 @@
+import threading
+
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from langchain_core.documents import Document  # noqa: E402
+
+from rag.pipeline import AdaptiveController, Checkpoint, EmbeddingPipeline  # noqa: E402
+
+
+class FakeEmbeddings:
+    def embed_documents(self, texts):
+        return [[float(len(t))] for t in texts]
+
+
+class FakeStore:
+    """Rejects a batch that names one ID twice, like ON CONFLICT DO UPDATE."""
+
+    def __init__(self):
+        self.rows  = {}
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def add_embeddings(self, texts, embeddings, metadatas, ids):
+        with self._lock:
+            self.calls += 1
+            if len(set(ids)) != len(ids):
+                raise RuntimeError("ON CONFLICT DO UPDATE command cannot affect row a second time")
+            self.rows.update(zip(ids, texts))
+
+
+def make_pipeline(tmp_path, store, on_file_done, batch_size=16, checkpoint=None, stored=None):
+    return EmbeddingPipeline(
+        embeddings=FakeEmbeddings(),
+        vectorstore=store,
+        checkpoint=checkpoint or Checkpoint(str(tmp_path / "checkpoint.log")),
+        controller=AdaptiveController(batch_size=batch_size, max_batch=batch_size,
+                                      concurrency=1, max_concurrency=1),
+        on_file_done=on_file_done,
+        max_retries=0,
+        stored=stored,
+    )
+
+
+def chunks(*texts):
+    return [Document(page_content=t) for t in texts], [f"id-{t}" for t in texts]
+
+
+def test_chunk_shared_by_two_files_is_written_once(tmp_path):
+    store, done = FakeStore(), []
+    pipeline = make_pipeline(tmp_path, store, done.append)
+    pipeline.add_file("a.md", *chunks("header", "alpha"))
+    pipeline.add_file("b.md", *chunks("header", "beta"))
+    stats = pipeline.close()
+
+    assert stats.failed_files == set()
+    assert sorted(done) == ["a.md", "b.md"]
+    assert sorted(store.rows) == ["id-alpha", "id-beta", "id-header"]
+    assert (stats.embedded, stats.shared) == (3, 1)
+    assert "id-header" in pipeline.claimed_ids
+
+
+def test_on_file_done_failure_settles_batch_once(tmp_path):
+    store = FakeStore()
+
+    def on_file_done(key):
+        raise OSError("manifest not writable")
+
+    pipeline = make_pipeline(tmp_path, store, on_file_done, batch_size=2)
+    pipeline.add_file("a.md", *chunks("one", "two"))
+    pipeline.add_file("b.md", *chunks("three", "four"))
+    stats = pipeline.close()    # would hang if the writer thread died
+
+    assert store.calls == 2     # no rewrite of a batch that was stored
+    assert stats.embedded == 4
+    assert stats.failed_files == {"a.md", "b.md"}
+
+
+def test_on_file_done_failure_without_new_chunks_marks_file_failed(tmp_path):
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.log"))
+    checkpoint.add(["id-one"])
+
+    def on_file_done(key):
+        raise OSError("manifest not writable")
+
+    pipeline = make_pipeline(tmp_path, FakeStore(), on_file_done, checkpoint=checkpoint)
+    pipeline.add_file("a.md", *chunks("one"))     # everything resumed: no batch at all
+    stats = pipeline.close()
+
+    assert stats.resumed == 1
+    assert stats.failed_files == {"a.md"}
+
+
+def test_checkpoint_discard_survives_reload(tmp_path):
+    path = str(tmp_path / "checkpoint.log")
+    checkpoint = Checkpoint(path)
+    checkpoint.add(["a", "b", "c"])
+    checkpoint.discard({"b", "missing"})
+    checkpoint.add(["b2"])
+    checkpoint.close()
+
+    assert Checkpoint(path).ids == {"a", "c", "b2"}
+
+
+def test_chunks_already_stored_are_not_embedded_again(tmp_path):
+    store, done = FakeStore(), []
+    pipeline = make_pipeline(tmp_path, store, done.append, stored={"id-intro", "id-gone"})
+    pipeline.forget({"id-gone"})        # deleted earlier in the run
+    pipeline.add_file("a.md", *chunks("intro", "edited", "gone"))
+    stats = pipeline.close()
+
+    assert done == ["a.md"]
+    assert sorted(store.rows) == ["id-edited", "id-gone"]
+    assert (stats.embedded, stats.stored) == (2, 1)
+    assert "id-intro" in pipeline.claimed_ids     # kept by _delete_stale
+
+
+def test_delete_stale_forgets_deleted_ids(tmp_path):
+    pytest.importorskip("langchain_postgres")
+    from rag.ingest import _delete_stale
+    from rag.manifest import Manifest
+
+    class Store:
+        deleted = []
+
+        def delete(self, ids):
+            self.deleted.extend(ids)
+
+    manifest = Manifest(str(tmp_path / "manifest.json"), {"b.md": {"chunk_ids": ["shared"]}})
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.log"))
+    checkpoint.add(["old", "shared", "kept"])
+    pipeline = make_pipeline(tmp_path, FakeStore(), lambda key: None, checkpoint=checkpoint,
+                             stored={"old", "shared", "kept"})
+    pipeline.claimed_ids.add("kept")
+
+    n = _delete_stale(Store(), manifest, pipeline, "a.md", {"old", "shared", "kept"})
+    pipeline.close()
+
+    assert n == 1 and Store.deleted == ["old"]
+    assert checkpoint.ids == {"shared", "kept"}     # a resumed run re-embeds "old"
+    assert pipeline.stored_ids == {"shared", "kept"}
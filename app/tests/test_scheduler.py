@@ -0,0 +1,126 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from scheduler import AgentScheduler, ConcurrencyLimiter, SchedulerBusy
+
+
+def test_async_waiter_on_another_loop_gets_released_slot():
+    limiter, order = ConcurrencyLimiter("test", 1), []
+    holding = threading.Event()
+
+    def holder():
+        with limiter:
+            holding.set()
+            time.sleep(0.1)
+            order.append("holder done")
+
+    async def waiter():
+        async with limiter:
+            order.append("waiter in")
+
+    t = threading.Thread(target=holder)
+    t.start()
+    holding.wait()
+    start = time.monotonic()
+    asyncio.run(waiter())               # its own loop, as in an agent turn
+    t.join()
+
+    assert order == ["holder done", "waiter in"]
+    assert time.monotonic() - start < 1
+    assert (limiter.in_flight, limiter.peak) == (0, 1)
+
+
+def test_cancelled_waiter_does_not_leak_its_slot():
+    limiter = ConcurrencyLimiter("test", 1)
+
+    async def main():
+        async with limiter:
+            task = asyncio.create_task(limiter.__aenter__())
+            await asyncio.sleep(0)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        async with limiter:             # would block forever on a leaked slot
+            pass
+
+    asyncio.run(asyncio.wait_for(main(), timeout=2))
+    assert limiter.in_flight == 0
+
+
+def test_waiters_are_served_in_order():
+    limiter, order = ConcurrencyLimiter("test", 1), []
+
+    async def worker(i):
+        async with limiter:
+            order.append(i)
+            await asyncio.sleep(0.01)
+
+    async def main():
+        await asyncio.gather(*(worker(i) for i in range(5)))
+
+    asyncio.run(main())
+    assert order == [0, 1, 2, 3, 4]
+
+
+def busy_scheduler(**limits):
+    """A one-worker scheduler whose worker is held by a turn until release.set()."""
+    scheduler = AgentScheduler(workers=1, **limits)
+    started, release = threading.Event(), threading.Event()
+
+    def hold():
+        started.set()
+        release.wait(5)
+
+    scheduler.submit("holder", hold)
+    assert started.wait(5)
+    return scheduler, release
+
+
+def test_users_are_served_round_robin():
+    scheduler, release = busy_scheduler(queue_max=10, user_queue_max=5)
+    order = []
+    tickets = [scheduler.submit(user, order.append, f"{user}{n}")
+               for user, n in [("a", 1), ("a", 2), ("a", 3), ("b", 1), ("b", 2), ("c", 1)]]
+
+    assert [scheduler.position(t) for t in tickets] == [1, 4, 6, 2, 5, 3]
+    release.set()
+    for t in tickets:
+        assert t.wait(5)
+
+    assert order == ["a1", "b1", "c1", "a2", "b2", "a3"]
+    assert scheduler.position(tickets[0]) == 0
+    assert scheduler.metrics()["completed"] == 7
+
+
+def test_submit_past_user_or_global_limit_raises_busy():
+    scheduler, release = busy_scheduler(queue_max=3, user_queue_max=2)
+    scheduler.submit("a", lambda: None)
+    scheduler.submit("a", lambda: None)
+    with pytest.raises(SchedulerBusy, match="already have 2"):
+        scheduler.submit("a", lambda: None)
+    scheduler.submit("b", lambda: None)
+    with pytest.raises(SchedulerBusy, match="capacity"):
+        scheduler.submit("c", lambda: None)
+
+    metrics = scheduler.metrics()
+    assert (metrics["queue_depth"], metrics["queued_users"], metrics["rejected"]) == (3, 2, 2)
+    release.set()
+
+
+def test_cancel_drops_queued_turn_only():
+    scheduler, release = busy_scheduler(queue_max=2, user_queue_max=2)
+    ran = []
+    first  = scheduler.submit("a", ran.append, "first")
+    second = scheduler.submit("a", ran.append, "second")
+
+    assert scheduler.cancel(second)
+    assert second.cancelled and second.done() and scheduler.position(second) == 0
+    assert not scheduler.cancel(second)
+    third = scheduler.submit("b", ran.append, "third")   # the cancelled slot is free again
+
+    release.set()
+    assert first.wait(5) and third.wait(5)
+    assert ran == ["first", "third"]
+    assert not scheduler.cancel(first)                   # already ran
@@ -0,0 +1,303 @@
+"""
+Inventory search — bulk property retrieval plus an in-memory trigram index.
+
+The per-name tools walk a container view and read properties object by
+object (one round trip each). For search we instead pull only the
+properties we index, for every VM, host, datastore and network, with
+PropertyCollector.RetrievePropertiesEx (paged, a few round trips total),
+and build a trigram index over:
+
+  - names (all four types)
+  - VM guest hostnames, IP addresses and annotation words
+  - host VMkernel IP addresses
+
+Text is normalised by lowercasing and dropping everything that is not a
+letter or digit, so "WEB-PROD-01", "web_prod_01" and "webprod01" are the
+same term; names that differ only in zero padding ("web-prod1") score
+just below an exact match. Otherwise scoring is trigram Jaccard similarity,
+lifted for substring matches; annotation words rank slightly below names.
+
+Queries merge the rarest posting lists first (Counter, in C) under a fixed
+budget and rescore only the best few hundred terms exactly — exact and
+zero-padding matches of a common word included — so latency stays in the
+low milliseconds at 50k objects. A multi-word query shares that budget
+between the whole string and its words.
+"""
+
+import heapq
+import re
+import threading
+import time
+from array import array
+from collections import Counter
+from typing import Callable
+
+from pyVmomi import vim, vmodl
+
+# Managed object type → (result label, properties to retrieve)
+PROPERTIES = {
+    vim.VirtualMachine: ("vm",        ["name", "config.annotation", "guest.hostName", "guest.net"]),
+    vim.HostSystem:     ("host",      ["name", "config.network.vnic"]),
+    vim.Datastore:      ("datastore", ["name"]),
+    vim.Network:        ("network",   ["name"]),
+}
+TYPES = tuple(label for label, _ in PROPERTIES.values())
+
+ANNOTATION_WORDS   = 64       # per object — annotations can be pasted runbooks
+POSTINGS_BUDGET    = 20_000   # posting entries merged per query before common trigrams are skipped
+RESCORE_CANDIDATES = 200      # terms rescored exactly per query
+FIELD_WEIGHT       = {"name": 1.0, "hostname": 0.95, "ip": 0.95, "annotation": 0.8}
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+_RUNS      = re.compile(r"[a-z]+|[0-9]+")
+
+
+def normalize(text: str) -> str:
+    return _NON_ALNUM.sub("", text.lower())
+
+
+def number_key(text: str) -> str:
+    """normalize() with leading zeros dropped from digit runs: web-prod1 == WEB-PROD-01."""
+    return "".join(
+        run.lstrip("0") or "0" if run.isdigit() else run
+        for run in _RUNS.findall(text.lower())
+    )
+
+
+def trigrams(norm: str) -> set[str]:
+    """Trigrams of a normalised string, padded so short and prefix terms still match."""
+    padded = f"^{norm}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+# ── Bulk retrieval ─────────────────────────────────────────────────────────────
+
+def fetch_inventory(content, page_size: int = 1000) -> list[dict]:
+    """
+    Retrieve searchable properties for every VM, host, datastore and network
+    in one paged PropertyCollector query over a container view.
+    """
+    pc   = content.propertyCollector
+    view = content.viewManager.CreateContainerView(content.rootFolder, list(PROPERTIES), True)
+    try:
+        traversal = vmodl.query.PropertyCollector.TraversalSpec(
+            name="traverseView", path="view", skip=False, type=vim.view.ContainerView,
+        )
+        spec = vmodl.query.PropertyCollector.FilterSpec(
+            objectSet=[vmodl.query.PropertyCollector.ObjectSpec(obj=view, skip=True, selectSet=[traversal])],
+            propSet=[
+                vmodl.query.PropertyCollector.PropertySpec(type=obj_type, pathSet=paths)
+                for obj_type, (_, paths) in PROPERTIES.items()
+            ],
+        )
+        options = vmodl.query.PropertyCollector.RetrieveOptions(maxObjects=page_size)
+
+        records = []
+        result  = pc.RetrievePropertiesEx([spec], options)
+        while result:
+            for obj in result.objects:
+                records.append(_to_record(obj.obj, {p.name: p.val for p in obj.propSet}))
+            if not result.token:
+                break
+            result = pc.ContinueRetrievePropertiesEx(result.token)
+        return records
+    finally:
+        view.Destroy()
+
+
+def _label(obj) -> str:
+    for obj_type, (label, _) in PROPERTIES.items():
+        if isinstance(obj, obj_type):
+            return label
+    return "other"
+
+
+def _to_record(obj, props: dict) -> dict:
+    record = {"type": _label(obj), "moid": obj._moId, "name": props.get("name", "")}
+    ips = []
+    if record["type"] == "vm":
+        record["annotation"] = props.get("config.annotation") or ""
+        record["hostname"]   = props.get("guest.hostName") or ""
+        for nic in props.get("guest.net") or []:
+            ips.extend(nic.ipAddress or [])
+    elif record["type"] == "host":
+        for vnic in props.get("config.network.vnic") or []:
+            if vnic.spec and vnic.spec.ip and vnic.spec.ip.ipAddress:
+                ips.append(vnic.spec.ip.ipAddress)
+    record["ips"] = ips
+    return record
+
+
+# ── Trigram index ──────────────────────────────────────────────────────────────
+
+class TrigramIndex:
+    """Immutable trigram index over inventory records; build a new one to refresh."""
+
+    def __init__(self, records: list[dict]):
+        self.records = records
+        # term id → (record index, field, original value, normalised value, number key)
+        self._terms: list[tuple[int, str, str, str, str]] = []
+        self._by_key: dict[str, list[int]] = {}
+        postings: dict[str, list[int]] = {}
+
+        for rec_id, record in enumerate(records):
+            for field, value in self._fields(record):
+                norm = normalize(value)
+                if not norm:
+                    continue
+                term_id = len(self._terms)
+                key     = number_key(value)
+                self._terms.append((rec_id, field, value, norm, key))
+                self._by_key.setdefault(key, []).append(term_id)
+                for gram in trigrams(norm):
+                    postings.setdefault(gram, []).append(term_id)
+
+        self._postings = {gram: array("I", ids) for gram, ids in postings.items()}
+        # A common annotation word is an exact match for thousands of terms;
+        # queries read only the first few, so put the best-weighted fields first
+        for ids in self._by_key.values():
+            ids.sort(key=lambda term_id: -FIELD_WEIGHT[self._terms[term_id][1]])
+
+    @staticmethod
+    def _fields(record: dict):
+        yield "name", record["name"]
+        if record.get("hostname"):
+            yield "hostname", record["hostname"]
+        for ip in record.get("ips", ()):
+            yield "ip", ip
+        words = dict.fromkeys(record.get("annotation", "").split())
+        for word in list(words)[:ANNOTATION_WORDS]:
+            yield "annotation", word
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def _candidates(self, grams: set[str], budget: int, rescore: int) -> list[int]:
+        """
+        Terms sharing the most trigrams with the query. Posting lists are
+        merged rarest first and the very common ones ("app", "prd") are skipped
+        once the budget is spent — they cannot separate candidates anyway.
+        The rarest list may overrun this pass's share of the query budget,
+        but not the whole budget; a word that common is found by its exact key.
+        """
+        lists  = sorted((self._postings[g] for g in grams if g in self._postings), key=len)
+        counts = Counter()
+        used   = 0
+        for ids in lists:
+            if used + len(ids) > budget and (used or len(ids) > POSTINGS_BUDGET):
+                break
+            counts.update(ids)
+            used += len(ids)
+        return [term_id for term_id, _ in counts.most_common(rescore)]
+
+    def _score_terms(
+        self,
+        query:   str,
+        budget:  int = POSTINGS_BUDGET,
+        rescore: int = RESCORE_CANDIDATES,
+    ) -> dict[int, tuple[float, int]]:
+        norm = normalize(query)
+        if not norm:
+            return {}
+        key   = number_key(query)
+        grams = trigrams(norm)
+
+        best: dict[int, tuple[float, int]] = {}
+        exact = self._by_key.get(key, ())[:rescore]
+        for term_id in set(self._candidates(grams, budget, rescore)) | set(exact):
+            rec_id, field, _, term, term_key = self._terms[term_id]
+            if term == norm:
+                score = 1.0
+            elif term_key == key:
+                score = 0.98          # web-prod1 vs WEB-PROD-01
+            else:
+                term_grams = trigrams(term)
+                shared     = len(grams & term_grams)
+                score      = shared / (len(grams) + len(term_grams) - shared)
+                if len(norm) >= 3 and (norm in term or term in norm):
+                    score = max(score, 0.5 + 0.4 * min(len(norm), len(term)) / max(len(norm), len(term)))
+            score *= FIELD_WEIGHT[field]
+            if score > best.get(rec_id, (0.0, -1))[0]:
+                best[rec_id] = (score, term_id)
+        return best
+
+    def search(
+        self,
+        query:     str,
+        limit:     int = 10,
+        types:     set[str] | None = None,
+        min_score: float = 0.2,
+    ) -> list[dict]:
+        """Ranked candidates for a free-text query (name fragment, IP, annotation word)."""
+        # Multi-word queries also match word by word ("payments london" → annotation words).
+        # The passes split one query's budget, so each extra word does not add a full one.
+        words  = query.split()
+        words  = [w for w in words if len(normalize(w)) >= 3] if len(words) > 1 else []
+        passes = 1 + len(words)
+        budget, rescore = POSTINGS_BUDGET // passes, max(limit, RESCORE_CANDIDATES // passes)
+
+        best = self._score_terms(query, budget, rescore)
+        for word in words:
+            for rec_id, hit in self._score_terms(word, budget, rescore).items():
+                if hit[0] > best.get(rec_id, (0.0, -1))[0]:
+                    best[rec_id] = hit
+
+        hits = (
+            (score, rec_id, term_id) for rec_id, (score, term_id) in best.items()
+            if score >= min_score and (not types or self.records[rec_id]["type"] in types)
+        )
+        results = []
+        for score, rec_id, term_id in heapq.nlargest(limit, hits, key=lambda h: (h[0], -h[1])):
+            record = self.records[rec_id]
+            _, field, value, _, _ = self._terms[term_id]
+            results.append({
+                "type":          record["type"],
+                "name":          record["name"],
+                "moid":          record["moid"],
+                "matched_field": field,
+                "matched_value": value,
+                "score":         round(score, 3),
+            })
+        return results
+
+
+# ── Refreshing holder ──────────────────────────────────────────────────────────
+
+class RefreshingIndex:
+    """
+    Holds an index built by build(). The first call builds it synchronously;
+    after ttl seconds the next call still answers from the old index while a
+    background thread rebuilds it.
+    """
+
+    def __init__(self, build: Callable[[], object], ttl: float, name: str = "inventory-index"):
+        self._build      = build
+        self.ttl         = ttl
+        self.name        = name
+        self._index      = None
+        self._built_at   = 0.0
+        self._refreshing = False
+        self._lock       = threading.Lock()
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self._built_at if self._index is not None else 0.0
+
+    def index(self):
+        with self._lock:
+            if self._index is None:
+                self._index, self._built_at = self._build(), time.monotonic()
+            elif self.age > self.ttl and not self._refreshing:
+                self._refreshing = True
+                threading.Thread(target=self._refresh, name=self.name, daemon=True).start()
+            return self._index
+
+    def _refresh(self):
+        try:
+            index = self._build()
+            with self._lock:
+                self._index, self._built_at = index, time.monotonic()
+        except Exception as e:
+            print(f"  Warning: {self.name} refresh failed, keeping previous index: {e}")
+        finally:
+            self._refreshing = False
@@ -0,0 +1,318 @@
+"""
+Live inventory cache — PropertyCollector updates plus a warm-start snapshot.
+
+InventoryCache keeps the properties behind list_vms / list_hosts /
+list_datastores / list_networks for every object in memory, fed by one
+long-lived session:
+
+  1. boot      — load the last snapshot (snapshot.py) and serve it at once,
+                 marked stale
+  2. sync      — CreateFilter over a container view, then WaitForUpdatesEx
+                 from version "": vCenter streams the current state in
+                 pages; objects not seen by the end were deleted while we
+                 were down and are dropped. Reads stay served throughout.
+  3. follow    — WaitForUpdatesEx(version) returns only enter / modify /
+                 leave changes; the cache is fresh until the session drops,
+                 then it goes stale again and step 2 repeats on reconnect
+
+A PropertyCollector version token is only valid for the filter (and
+session) that produced it, so a token saved before a restart cannot be
+resumed: it is written to the snapshot for diagnostics, and the boot-time
+catch-up is the one paged bulk read in step 2 — off the request path.
+
+The filter asks for whole property values (partialUpdates=False). Should an
+element path such as guest.net["4000"] still arrive, the cache re-reads the
+base property rather than storing the path as a key of its own.
+
+The snapshot is rewritten every INVENTORY_SNAPSHOT_INTERVAL seconds while
+there are unsaved changes, and right after each sync completes.
+"""
+
+import threading
+import time
+from typing import Callable
+
+from pyVim.connect import Disconnect
+from pyVmomi import vim, vmodl
+
+from snapshot import SnapshotReader, write_snapshot
+
+# Managed object type → (record type, properties kept in the cache)
+CACHE_PROPERTIES = {
+    vim.VirtualMachine: ("vm", [
+        "name", "runtime.powerState", "runtime.host", "config.hardware.numCPU",
+        "config.hardware.memoryMB", "config.guestFullName", "config.annotation",
+        "guest.ipAddress", "guest.hostName", "guest.net",
+    ]),
+    vim.HostSystem: ("host", [
+        "name", "runtime.connectionState", "runtime.powerState", "hardware.cpuInfo.numCpuCores",
+        "hardware.memorySize", "hardware.systemInfo.model", "hardware.systemInfo.vendor",
+        "config.product.version", "config.network.vnic",
+    ]),
+    vim.Datastore: ("datastore", [
+        "name", "summary.type", "summary.capacity", "summary.freeSpace", "summary.accessible",
+    ]),
+    vim.Network: ("network", ["name", "summary.accessible"]),
+}
+
+
+def _label(obj) -> str:
+    for obj_type, (label, _) in CACHE_PROPERTIES.items():
+        if isinstance(obj, obj_type):
+            return label
+    return "other"
+
+
+def base_property(name: str) -> str:
+    """'guest.net["4000"].ipAddress' → 'guest.net': the cached property an element path belongs to."""
+    return name.split("[", 1)[0]
+
+
+def read_property(obj, path: str):
+    """Current value of a dotted property path on a managed object (None if any step is unset)."""
+    value = obj
+    for part in path.split("."):
+        value = getattr(value, part, None)
+        if value is None:
+            return None
+    return value
+
+
+def plain(name: str, value):
+    """Convert a property value to something JSON can hold."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if name == "guest.net":
+        return [ip for nic in value for ip in (nic.ipAddress or [])]
+    if name == "config.network.vnic":
+        return [v.spec.ip.ipAddress for v in value if v.spec and v.spec.ip and v.spec.ip.ipAddress]
+    if isinstance(value, vmodl.ManagedObject):
+        return value._moId
+    return str(value)
+
+
+class InventoryCache:
+    """Thread-safe moid → {"type", "moid", "props"} map kept current in the background."""
+
+    def __init__(
+        self,
+        connect:           Callable,
+        snapshot_path:     str,
+        snapshot_interval: float = 60.0,
+        wait_seconds:      int = 30,
+    ):
+        self._connect          = connect
+        self.snapshot_path     = snapshot_path
+        self.snapshot_interval = snapshot_interval
+        self.wait_seconds      = wait_seconds
+
+        self._records: dict[str, dict] = {}
+        self._lock        = threading.Lock()
+        self._stop        = threading.Event()
+        self._thread      = None
+        self.loaded       = False      # any data at all (snapshot or sync)
+        self.stale        = True       # not yet confirmed by a completed sync
+        self.as_of        = 0.0        # unix time the data was last known current
+        self.version      = ""
+        self.generation   = 0          # bumped on every applied change
+        self._saved_gen   = 0
+        self._saved_at    = 0.0
+
+    # ── Reads ──────────────────────────────────────────────────────────────────
+
+    def records(self, kind: str | None = None) -> list[dict]:
+        with self._lock:
+            return [r for r in self._records.values() if kind is None or r["type"] == kind]
+
+    def name_of(self, moid: str | None) -> str:
+        with self._lock:
+            rec = self._records.get(moid) if moid else None
+            return rec["props"].get("name", "") if rec else ""
+
+    def freshness(self) -> tuple[bool, float]:
+        """(stale, as_of) read together, so a sync finishing in between cannot mix them."""
+        with self._lock:
+            return self.stale, self.as_of
+
+    def search_records(self) -> list[dict]:
+        """Records in the shape inventory.TrigramIndex indexes."""
+        out = []
+        for r in self.records():
+            p = r["props"]
+            ips = list(p.get("guest.net") or p.get("config.network.vnic") or [])
+            if p.get("guest.ipAddress") and p["guest.ipAddress"] not in ips:
+                ips.append(p["guest.ipAddress"])
+            out.append({
+                "type":       r["type"],
+                "moid":       r["moid"],
+                "name":       p.get("name", ""),
+                "annotation": p.get("config.annotation") or "",
+                "hostname":   p.get("guest.hostName") or "",
+                "ips":        ips,
+            })
+        return out
+
+    # ── Lifecycle ──────────────────────────────────────────────────────────────
+
+    def start(self) -> "InventoryCache":
+        self.load_snapshot()
+        self._thread = threading.Thread(target=self._run, name="inventory-cache", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def load_snapshot(self):
+        try:
+            with SnapshotReader(self.snapshot_path) as snap:
+                records = {r["moid"]: r for r in snap}
+                created, version = snap.created_at, snap.version
+        except Exception as e:
+            # Missing, truncated or corrupt — never worth failing boot over
+            print(f"  Inventory snapshot not loaded ({e}); waiting for first sync")
+            return
+        with self._lock:
+            self._records = records
+            self.loaded, self.stale, self.as_of = True, True, created
+            self.version = version
+        print(f"  Loaded inventory snapshot: {len(records)} objects from "
+              f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(created))}")
+
+    def save_snapshot(self):
+        with self._lock:
+            records    = list(self._records.values())
+            generation = self.generation
+            version    = self.version
+            as_of      = self.as_of
+        write_snapshot(self.snapshot_path, records, version, as_of or time.time())
+        self._saved_gen, self._saved_at = generation, time.monotonic()
+
+    # ── Sync loop ──────────────────────────────────────────────────────────────
+
+    def _run(self):
+        backoff = 1.0
+        while not self._stop.is_set():
+            si = None
+            try:
+                si, content = self._connect()
+                self._follow(content)
+            except Exception as e:
+                with self._lock:
+                    self.stale = True
+                print(f"  Warning: inventory sync interrupted, serving cached data as stale: {e}")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 60.0)
+            else:
+                backoff = 1.0
+            finally:
+                if si is not None:
+                    try:
+                        Disconnect(si)
+                    except Exception:
+                        pass
+
+    def _filter_spec(self, view):
+        traversal = vmodl.query.PropertyCollector.TraversalSpec(
+            name="traverseView", path="view", skip=False, type=vim.view.ContainerView,
+        )
+        return vmodl.query.PropertyCollector.FilterSpec(
+            objectSet=[vmodl.query.PropertyCollector.ObjectSpec(obj=view, skip=True, selectSet=[traversal])],
+            propSet=[
+                vmodl.query.PropertyCollector.PropertySpec(type=obj_type, pathSet=paths)
+                for obj_type, (_, paths) in CACHE_PROPERTIES.items()
+            ],
+        )
+
+    def _follow(self, content):
+        # A private collector keeps this filter apart from any other client of the session
+        pc   = content.propertyCollector.CreatePropertyCollector()
+        view = content.viewManager.CreateContainerView(content.rootFolder, list(CACHE_PROPERTIES), True)
+        try:
+            # Whole values: element paths like guest.net["4000"] would not match the cached keys
+            pc.CreateFilter(self._filter_spec(view), partialUpdates=False)
+            options = vmodl.query.PropertyCollector.WaitOptions(maxWaitSeconds=self.wait_seconds)
+            version = ""
+            seen: set[str] | None = set()       # moids entered during the initial sync
+
+            while not self._stop.is_set():
+                update = pc.WaitForUpdatesEx(version, options)
+                if update is not None:
+                    self._apply(update, seen)
+                    version = update.version
+                    with self._lock:
+                        self.version = version
+                if seen is not None and (update is None or not update.truncated):
+                    self._finish_sync(seen)
+                    seen = None
+                if seen is None:
+                    with self._lock:
+                        self.as_of = time.time()
+                    if (self.generation != self._saved_gen
+                            and time.monotonic() - self._saved_at >= self.snapshot_interval):
+                        self.save_snapshot()
+        finally:
+            try:
+                view.Destroy()
+                pc.Destroy()
+            except Exception:
+                pass
+
+    def _apply(self, update, seen: set[str] | None):
+        # Element paths name a slice of an array property; re-read the whole
+        # property (outside the lock — it is a round trip) and apply that instead
+        rereads = {
+            (obj_update.obj._moId, base_property(change.name)): obj_update.obj
+            for filter_update in update.filterSet or []
+            for obj_update in filter_update.objectSet or []
+            if obj_update.kind != "leave"
+            for change in obj_update.changeSet or []
+            if "[" in change.name
+        }
+        fresh = {}
+        for (moid, prop), obj in rereads.items():
+            try:
+                fresh[moid, prop] = plain(prop, read_property(obj, prop))
+            except Exception as e:
+                print(f"  Warning: could not re-read {prop} of {moid}: {e}")
+                fresh[moid, prop] = None
+
+        with self._lock:
+            for filter_update in update.filterSet or []:
+                for obj_update in filter_update.objectSet or []:
+                    moid = obj_update.obj._moId
+                    if obj_update.kind == "leave":
+                        self._records.pop(moid, None)
+                        continue
+                    if seen is not None:
+                        seen.add(moid)
+                    if obj_update.kind == "enter":
+                        # Full property set follows — start clean
+                        record = {"type": _label(obj_update.obj), "moid": moid, "props": {}}
+                        self._records[moid] = record
+                    else:
+                        record = self._records.setdefault(
+                            moid, {"type": _label(obj_update.obj), "moid": moid, "props": {}}
+                        )
+                    for change in obj_update.changeSet or []:
+                        if "[" in change.name:
+                            prop = base_property(change.name)
+                            if fresh.get((moid, prop)) is None:
+                                record["props"].pop(prop, None)
+                            else:
+                                record["props"][prop] = fresh[moid, prop]
+                        elif change.op in ("remove", "indirectRemove"):
+                            record["props"].pop(change.name, None)
+                        else:
+                            record["props"][change.name] = plain(change.name, change.val)
+            self.generation += 1
+
+    def _finish_sync(self, seen: set[str]):
+        with self._lock:
+            gone = [moid for moid in self._records if moid not in seen]
+            for moid in gone:
+                del self._records[moid]
+            self.loaded, self.stale, self.as_of = True, False, time.time()
+            count = len(self._records)
+        print(f"  Inventory sync complete: {count} objects ({len(gone)} removed since snapshot)")
+        self.save_snapshot()
@@ -2,23 +2,55 @@
 """
 vCenter MCP Server — Enterprise v2
 Exposes VMware vSphere infrastructure as tools via MCP HTTP/SSE transport.
+
+search_inventory is served from an in-memory trigram index (inventory.py)
+that is rebuilt in the background every INVENTORY_INDEX_TTL seconds. Name
+lookups that miss answer with "did_you_mean" candidates from the same index.
+
+With INVENTORY_CACHE on (default), the list tools and the summary are
+answered from a PropertyCollector-fed cache (inventory_cache.py) that is
+warm-started from an on-disk snapshot. Until the first sync after boot
+completes, those answers carry "stale": true. List tools always answer
+{"stale", "as_of", "items"}, whether from the cache or a live walk.
+
+get_dependents / get_blast_radius traverse a VM / host / network /
+datastore graph (topology.py) rebuilt every TOPOLOGY_TTL seconds.
+
+rightsizing_report analyses the whole VM fleet in one vectorised pass
+(rightsizing.py); each report is kept for RIGHTSIZING_TTL seconds so paging
+through it does not re-query vCenter.
 """
 
 import ssl
 import json
 import os
+import threading
+import time
 from typing import Any
 
+from anyio import to_thread
 from mcp.server.fastmcp import FastMCP
 from pyVim.connect import SmartConnect, Disconnect
 from pyVmomi import vim
 
+from inventory import TYPES, RefreshingIndex, TrigramIndex, fetch_inventory
+from inventory_cache import InventoryCache
+from rightsizing import RightsizingReport, build_report
+from topology import NODE_TYPES, TopologyGraph, fetch_topology
+
 # ── Config from environment ────────────────────────────────────────────────────
-VCENTER_HOST     = os.environ["VCENTER_HOST"]
-VCENTER_USERNAME = os.environ["VCENTER_USERNAME"]
-VCENTER_PASSWORD = os.environ["VCENTER_PASSWORD"]
-VCENTER_PORT     = int(os.environ.get("VCENTER_PORT", 443))
-SSL_VERIFY       = os.environ.get("VCENTER_SSL_VERIFY", "false").lower() == "true"
+VCENTER_HOST                = os.environ["VCENTER_HOST"]
+VCENTER_USERNAME            = os.environ["VCENTER_USERNAME"]
+VCENTER_PASSWORD            = os.environ["VCENTER_PASSWORD"]
+VCENTER_PORT                = int(os.environ.get("VCENTER_PORT", 443))
+SSL_VERIFY                  = os.environ.get("VCENTER_SSL_VERIFY", "false").lower() == "true"
+INVENTORY_INDEX_TTL         = int(os.environ.get("INVENTORY_INDEX_TTL", 300))   # seconds between index rebuilds
+INVENTORY_CACHE             = os.environ.get("INVENTORY_CACHE", "true").lower() == "true"
+INVENTORY_SNAPSHOT_PATH     = os.environ.get("INVENTORY_SNAPSHOT_PATH", "/data/inventory.snap")
+INVENTORY_SNAPSHOT_INTERVAL = int(os.environ.get("INVENTORY_SNAPSHOT_INTERVAL", 60))   # seconds
+TOPOLOGY_TTL                = int(os.environ.get("TOPOLOGY_TTL", 300))   # seconds between graph rebuilds
+RIGHTSIZING_TTL             = int(os.environ.get("RIGHTSIZING_TTL", 900))   # seconds a fleet report is reused
+RIGHTSIZING_PERF_BATCH      = int(os.environ.get("RIGHTSIZING_PERF_BATCH", 64))   # VMs per QueryPerf (≤ maxQueryMetrics)
 
 mcp = FastMCP(
     "vCenter MCP Server",
@@ -48,11 +80,114 @@ def container_view(content, obj_type):
     )
 
 
+inventory_cache = InventoryCache(
+    connect=get_content,
+    snapshot_path=INVENTORY_SNAPSHOT_PATH,
+    snapshot_interval=INVENTORY_SNAPSHOT_INTERVAL,
+) if INVENTORY_CACHE else None
+
+
+def load_inventory() -> list[dict]:
+    if inventory_cache is not None and inventory_cache.loaded:
+        return inventory_cache.search_records()
+    si, content = get_content()
+    try:
+        return fetch_inventory(content)
+    finally:
+        Disconnect(si)
+
+
+inventory_search = RefreshingIndex(lambda: TrigramIndex(load_inventory()), ttl=INVENTORY_INDEX_TTL)
+
+
+def load_topology() -> TopologyGraph:
+    si, content = get_content()
+    try:
+        return TopologyGraph(fetch_topology(content))
+    finally:
+        Disconnect(si)
+
+
+topology = RefreshingIndex(load_topology, ttl=TOPOLOGY_TTL, name="topology")
+
+
+def load_rightsizing(history_days: int) -> RightsizingReport:
+    si, content = get_content()
+    try:
+        return build_report(content, history_days, perf_batch=RIGHTSIZING_PERF_BATCH)
+    finally:
+        Disconnect(si)
+
+
+# history_days → report, so paging through one report reuses a single fleet query
+rightsizing_reports: dict[int, RefreshingIndex] = {}
+rightsizing_lock = threading.Lock()
+
+
+def rightsizing_holder(days: int) -> RefreshingIndex:
+    """
+    One RefreshingIndex per history window. Its own lock makes concurrent
+    first calls wait for a single build instead of each running the fleet query.
+    """
+    with rightsizing_lock:
+        if days not in rightsizing_reports:
+            rightsizing_reports[days] = RefreshingIndex(
+                lambda: load_rightsizing(days), ttl=RIGHTSIZING_TTL, name=f"rightsizing-{days}d",
+            )
+        return rightsizing_reports[days]
+
+
+def freshness(stale: bool = False, as_of: float | None = None) -> dict:
+    """stale is true while the cache serves its boot snapshot and resyncs; as_of is when the data was current."""
+    return {"stale": stale, "as_of": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(as_of or time.time()))}
+
+
+def list_result(items: list[dict], stale: bool = False, as_of: float | None = None) -> str:
+    """The one shape every list tool returns, cached or live: {"stale", "as_of", "items"}."""
+    return json.dumps({**freshness(stale, as_of), "items": items}, indent=2)
+
+
+def from_cache(kind: str, render) -> str | None:
+    """
+    Answer a list tool from the inventory cache, or None to fall back to a
+    live container walk (cache disabled, or no snapshot and first sync not done).
+    """
+    if inventory_cache is None or not inventory_cache.loaded:
+        return None
+    items = sorted((render(r["props"]) for r in inventory_cache.records(kind)), key=lambda i: i["name"])
+    stale, as_of = inventory_cache.freshness()
+    return list_result(items, stale=stale, as_of=as_of)
+
+
+def not_found(kind: str, name: str) -> str:
+    """Error for a missed name lookup, with close matches so the agent can retry once."""
+    label = {"vm": "VM", "host": "Host"}[kind]
+    error = {"error": f"{label} '{name}' not found"}
+    try:
+        matches = inventory_search.index().search(name, limit=5, types={kind}, min_score=0.4)
+        if matches:
+            error["did_you_mean"] = [m["name"] for m in matches]
+    except Exception:
+        pass
+    return json.dumps(error)
+
+
 # ── VM tools ───────────────────────────────────────────────────────────────────
 
 @mcp.tool()
 def list_vms() -> str:
     """List all virtual machines with their power state, CPU, memory, and IP."""
+    cached = from_cache("vm", lambda p: {
+        "name":        p.get("name", ""),
+        "power_state": p.get("runtime.powerState", ""),
+        "num_cpu":     p.get("config.hardware.numCPU") or 0,
+        "memory_mb":   p.get("config.hardware.memoryMB") or 0,
+        "guest_os":    p.get("config.guestFullName") or "",
+        "ip_address":  p.get("guest.ipAddress") or "",
+        "host":        inventory_cache.name_of(p.get("runtime.host")),
+    })
+    if cached is not None:
+        return cached
     si, content = get_content()
     try:
         view = container_view(content, vim.VirtualMachine)
@@ -72,7 +207,7 @@ def list_vms() -> str:
             except Exception:
                 pass
         view.Destroy()
-        return json.dumps(vms, indent=2)
+        return list_result(vms)
     finally:
         Disconnect(si)
 
@@ -104,7 +239,7 @@ def get_vm_details(vm_name: str) -> str:
                 view.Destroy()
                 return json.dumps(details, indent=2)
         view.Destroy()
-        return json.dumps({"error": f"VM '{vm_name}' not found"})
+        return not_found("vm", vm_name)
     finally:
         Disconnect(si)
 
@@ -124,7 +259,7 @@ def power_on_vm(vm_name: str) -> str:
                 view.Destroy()
                 return json.dumps({"status": "power on task started", "vm": vm_name})
         view.Destroy()
-        return json.dumps({"error": f"VM '{vm_name}' not found"})
+        return not_found("vm", vm_name)
     finally:
         Disconnect(si)
 
@@ -149,7 +284,7 @@ def power_off_vm(vm_name: str, confirm: bool = False) -> str:
                 view.Destroy()
                 return json.dumps({"status": "power off task started", "vm": vm_name})
         view.Destroy()
-        return json.dumps({"error": f"VM '{vm_name}' not found"})
+        return not_found("vm", vm_name)
     finally:
         Disconnect(si)
 
@@ -171,7 +306,7 @@ def restart_vm(vm_name: str, confirm: bool = False) -> str:
                 view.Destroy()
                 return json.dumps({"status": "restart task started", "vm": vm_name})
         view.Destroy()
-        return json.dumps({"error": f"VM '{vm_name}' not found"})
+        return not_found("vm", vm_name)
     finally:
         Disconnect(si)
 
@@ -181,6 +316,18 @@ def restart_vm(vm_name: str, confirm: bool = False) -> str:
 @mcp.tool()
 def list_hosts() -> str:
     """List all ESXi hosts with connection state, CPU cores, and memory."""
+    cached = from_cache("host", lambda p: {
+        "name":             p.get("name", ""),
+        "connection_state": p.get("runtime.connectionState", ""),
+        "power_state":      p.get("runtime.powerState", ""),
+        "cpu_cores":        p.get("hardware.cpuInfo.numCpuCores") or 0,
+        "memory_gb":        round((p.get("hardware.memorySize") or 0) / (1024**3), 2),
+        "model":            p.get("hardware.systemInfo.model") or "",
+        "vendor":           p.get("hardware.systemInfo.vendor") or "",
+        "version":          p.get("config.product.version") or "",
+    })
+    if cached is not None:
+        return cached
     si, content = get_content()
     try:
         view = container_view(content, vim.HostSystem)
@@ -200,7 +347,7 @@ def list_hosts() -> str:
             except Exception:
                 pass
         view.Destroy()
-        return json.dumps(hosts, indent=2)
+        return list_result(hosts)
     finally:
         Disconnect(si)
 
@@ -225,7 +372,7 @@ def get_host_performance(host_name: str) -> str:
                 view.Destroy()
                 return json.dumps(perf, indent=2)
         view.Destroy()
-        return json.dumps({"error": f"Host '{host_name}' not found"})
+        return not_found("host", host_name)
     finally:
         Disconnect(si)
 
@@ -235,6 +382,19 @@ def get_host_performance(host_name: str) -> str:
 @mcp.tool()
 def list_datastores() -> str:
     """List all datastores with capacity, free space, and accessibility."""
+    def render(p):
+        capacity, free = p.get("summary.capacity") or 0, p.get("summary.freeSpace") or 0
+        return {
+            "name":         p.get("name", ""),
+            "type":         p.get("summary.type") or "",
+            "capacity_gb":  round(capacity / (1024**3), 2),
+            "free_gb":      round(free / (1024**3), 2),
+            "used_gb":      round((capacity - free) / (1024**3), 2),
+            "accessible":   p.get("summary.accessible"),
+        }
+    cached = from_cache("datastore", render)
+    if cached is not None:
+        return cached
     si, content = get_content()
     try:
         view = container_view(content, vim.Datastore)
@@ -253,7 +413,7 @@ def list_datastores() -> str:
             except Exception:
                 pass
         view.Destroy()
-        return json.dumps(datastores, indent=2)
+        return list_result(datastores)
     finally:
         Disconnect(si)
 
@@ -263,6 +423,12 @@ def list_datastores() -> str:
 @mcp.tool()
 def list_networks() -> str:
     """List all networks and port groups in the vCenter inventory."""
+    cached = from_cache("network", lambda p: {
+        "name":       p.get("name", ""),
+        "accessible": p.get("summary.accessible"),
+    })
+    if cached is not None:
+        return cached
     si, content = get_content()
     try:
         view = container_view(content, vim.Network)
@@ -276,7 +442,7 @@ def list_networks() -> str:
             except Exception:
                 pass
         view.Destroy()
-        return json.dumps(networks, indent=2)
+        return list_result(networks)
     finally:
         Disconnect(si)
 
@@ -305,7 +471,7 @@ def list_vm_snapshots(vm_name: str) -> str:
                 view.Destroy()
                 return json.dumps(snaps, indent=2)
         view.Destroy()
-        return json.dumps({"error": f"VM '{vm_name}' not found"})
+        return not_found("vm", vm_name)
     finally:
         Disconnect(si)
 
@@ -327,16 +493,140 @@ def create_vm_snapshot(vm_name: str, snapshot_name: str, description: str = "")
                 view.Destroy()
                 return json.dumps({"status": "snapshot task started", "vm": vm_name, "snapshot": snapshot_name})
         view.Destroy()
-        return json.dumps({"error": f"VM '{vm_name}' not found"})
+        return not_found("vm", vm_name)
     finally:
         Disconnect(si)
 
 
+# ── Search tools ───────────────────────────────────────────────────────────────
+
+@mcp.tool()
+def search_inventory(query: str, types: str = "", limit: int = 10) -> str:
+    """
+    Fuzzy search over VM, host, datastore and network names, VM hostnames,
+    IP addresses and annotations. Use it to resolve approximate names
+    (e.g. "web-prod1") before calling a tool that needs an exact name.
+    types: optional comma-separated filter — vm, host, datastore, network.
+    """
+    wanted = {t.strip().lower() for t in types.split(",") if t.strip()}
+    unknown = wanted - set(TYPES)
+    if unknown:
+        return json.dumps({"error": f"Unknown types {sorted(unknown)}; use {', '.join(TYPES)}"})
+    index = inventory_search.index()
+    start = time.perf_counter()
+    results = index.search(query, limit=max(1, min(limit, 50)), types=wanted or None)
+    return json.dumps({
+        "query":           query,
+        "results":         results,
+        "indexed_objects": len(index),
+        "index_age_s":     round(inventory_search.age),
+        "took_ms":         round((time.perf_counter() - start) * 1000, 2),
+    }, indent=2)
+
+
+# ── Topology tools ─────────────────────────────────────────────────────────────
+
+def topology_query(entity: str, entity_type: str, answer) -> str:
+    """Resolve entity in the topology graph and return answer(graph, moid) as JSON."""
+    entity_type = entity_type.strip().lower()
+    if entity_type and entity_type not in NODE_TYPES:
+        return json.dumps({"error": f"Unknown entity_type '{entity_type}'; use {', '.join(NODE_TYPES)}"})
+    graph   = topology.index()
+    matches = graph.resolve(entity, entity_type)
+    if not matches:
+        error = {"error": f"'{entity}' not found in the topology"}
+        try:
+            hits = inventory_search.index().search(entity, limit=5, min_score=0.4)
+            if hits:
+                error["did_you_mean"] = [f"{h['name']} ({h['type']})" for h in hits]
+        except Exception:
+            pass
+        return json.dumps(error)
+    if len(matches) > 1:
+        return json.dumps({
+            "error":      f"'{entity}' is ambiguous — pass entity_type or a moid",
+            "candidates": [{"name": graph.nodes[m]["name"], "type": graph.nodes[m]["type"], "moid": m}
+                           for m in matches],
+        })
+    start  = time.perf_counter()
+    result = answer(graph, matches[0])
+    result["took_ms"]     = round((time.perf_counter() - start) * 1000, 2)
+    result["graph_age_s"] = round(topology.age)
+    return json.dumps(result, indent=2)
+
+
+@mcp.tool()
+def get_dependents(entity: str, entity_type: str = "", limit: int = 200) -> str:
+    """
+    Show what directly uses an entity (VMs on a datastore or portgroup, VMs on
+    a host, hosts in a cluster, portgroups on a distributed switch) and what
+    the entity itself depends on.
+    entity: name or managed object ID. entity_type: optional — vm, host,
+    datastore, portgroup, network, dvs or cluster.
+    """
+    return topology_query(entity, entity_type,
+                          lambda graph, moid: graph.dependents(moid, max_items=max(1, limit)))
+
+
+@mcp.tool()
+def get_blast_radius(entity: str, entity_type: str = "", limit: int = 200) -> str:
+    """
+    Estimate what breaks if an entity (datastore, portgroup, network,
+    distributed switch, host or cluster) goes down: impacted VMs and hosts
+    through the full dependency chain, hosts left degraded, and how many
+    impacted VMs are powered on. Answers "what happens if X fails".
+    entity_type: optional — vm, host, datastore, portgroup, network, dvs or cluster.
+    """
+    return topology_query(entity, entity_type,
+                          lambda graph, moid: graph.blast_radius(moid, max_items=max(1, limit)))
+
+
+# ── Capacity tools ─────────────────────────────────────────────────────────────
+
+RIGHTSIZING_ACTIONS = ("downsize", "upsize", "resize", "ok", "no_data")
+
+
+@mcp.tool()
+async def rightsizing_report(history_days: int = 0, action: str = "", page: int = 1, page_size: int = 25) -> str:
+    """
+    Fleet-wide VM rightsizing: compares each powered-on VM's p95 CPU and
+    memory demand with its allocation and recommends vCPU / memory targets,
+    ranked by size of change. The fleet summary totals reclaimable vCPU and GB.
+    history_days: 0 uses the current quickStats snapshot (fast); 1-30 uses
+    performance history (slower, more reliable).
+    action: optional filter — downsize, upsize, resize, ok or no_data
+    (default: all recommendations that change something).
+    """
+    action = action.strip().lower()
+    if action and action not in RIGHTSIZING_ACTIONS:
+        return json.dumps({"error": f"Unknown action '{action}'; use {', '.join(RIGHTSIZING_ACTIONS)}"})
+    days = max(0, min(history_days, 30))
+    holder = rightsizing_holder(days)
+    # FastMCP runs sync tools on its event loop; a first build (minutes with
+    # history) must not stall every other client, so it runs on a worker thread
+    report = await to_thread.run_sync(holder.index)
+    result = report.page(action, page=page, page_size=max(1, min(page_size, 200)))
+    result["report_age_s"] = round(holder.age)
+    return json.dumps(result, indent=2)
+
+
 # ── Summary / overview tools ───────────────────────────────────────────────────
 
 @mcp.tool()
 def get_inventory_summary() -> str:
     """Return a high-level count of VMs, hosts, and datastores in the environment."""
+    if inventory_cache is not None and inventory_cache.loaded:
+        vms = inventory_cache.records("vm")
+        powered_on = sum(1 for v in vms if v["props"].get("runtime.powerState") == "poweredOn")
+        summary = {
+            "total_vms":        len(vms),
+            "powered_on_vms":   powered_on,
+            "powered_off_vms":  len(vms) - powered_on,
+            "total_hosts":      len(inventory_cache.records("host")),
+            "total_datastores": len(inventory_cache.records("datastore")),
+        }
+        stale, as_of = inventory_cache.freshness()
+        return json.dumps({**summary, **freshness(stale, as_of)}, indent=2)
     si, content = get_content()
     try:
         vm_view   = container_view(content, vim.VirtualMachine)
@@ -355,7 +645,7 @@ def get_inventory_summary() -> str:
         vm_view.Destroy()
         host_view.Destroy()
         ds_view.Destroy()
-        return json.dumps(summary, indent=2)
+        return json.dumps({**summary, **freshness()}, indent=2)
     finally:
         Disconnect(si)
 
@@ -384,5 +674,7 @@ def get_alarms() -> str:
 # ── Entry point ────────────────────────────────────────────────────────────────
 
 if __name__ == "__main__":
+    if inventory_cache is not None:
+        inventory_cache.start()   # serves the snapshot at once, syncs in the background
     # Enterprise v2: always run SSE transport (HTTP server on :8080)
     mcp.run(transport="sse")
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Modules import each other flat, as in the container (COPY *.py .)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
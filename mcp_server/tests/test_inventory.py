@@ -0,0 +1,89 @@
+import pytest
+
+pytest.importorskip("pyVmomi")
+
+import inventory  # noqa: E402
+from inventory import TrigramIndex, number_key  # noqa: E402
+
+
+def record(type_, name, moid, ips=(), annotation="", hostname=""):
+    return {"type": type_, "name": name, "moid": moid, "ips": list(ips),
+            "annotation": annotation, "hostname": hostname}
+
+
+@pytest.fixture(scope="module")
+def index():
+    return TrigramIndex([
+        record("vm", "WEB-PROD-01", "vm-1", ips=["10.20.30.40"], hostname="web01.corp.local"),
+        record("vm", "app-payroll-db-03", "vm-2", annotation="Owner: payments team, London DC"),
+        record("vm", "web-test-17", "vm-3"),
+        record("host", "esx-01.corp.local", "host-1", ips=["10.20.0.11"]),
+        record("datastore", "payroll-ds", "datastore-1"),
+        record("network", "VM Network", "network-1"),
+    ])
+
+
+def top(hits):
+    return (hits[0]["moid"], hits[0]["matched_field"], hits[0]["score"]) if hits else None
+
+
+def test_number_key_drops_zero_padding():
+    assert number_key("WEB-PROD-01") == number_key("web_prod1") == "webprod1"
+    assert number_key("host-000") == "host0"
+
+
+def test_exact_name_scores_one(index):
+    assert top(index.search("web_prod_01")) == ("vm-1", "name", 1.0)
+
+
+def test_zero_padding_ranks_just_below_exact(index):
+    assert top(index.search("web-prod1")) == ("vm-1", "name", 0.98)
+
+
+def test_substring_match(index):
+    moid, field, score = top(index.search("payroll-db"))
+    assert (moid, field) == ("vm-2", "name") and 0.5 < score < 1.0
+
+
+def test_typo_still_matches(index):
+    moid, field, score = top(index.search("web-prdo-01"))
+    assert (moid, field) == ("vm-1", "name") and score >= 0.2
+
+
+def test_vm_and_host_ips(index):
+    assert top(index.search("10.20.30.40")) == ("vm-1", "ip", 0.95)
+    assert top(index.search("10.20.0.11")) == ("host-1", "ip", 0.95)
+
+
+def test_types_filter(index):
+    assert {h["type"] for h in index.search("payroll")} == {"vm", "datastore"}
+    assert [h["moid"] for h in index.search("payroll", types={"datastore"})] == ["datastore-1"]
+
+
+def test_multi_word_query_matches_annotation_words(index):
+    hits = index.search("payments london")
+    assert top(hits)[:2] == ("vm-2", "annotation")
+
+
+def test_multi_word_query_shares_one_postings_budget(index, monkeypatch):
+    budgets = []
+    candidates = TrigramIndex._candidates
+
+    def spy(self, grams, budget, rescore):
+        budgets.append(budget)
+        return candidates(self, grams, budget, rescore)
+
+    monkeypatch.setattr(TrigramIndex, "_candidates", spy)
+    index.search("payments team london")
+
+    assert len(budgets) == 4     # the whole query, then each word
+    assert sum(budgets) <= inventory.POSTINGS_BUDGET
+
+
+def test_common_exact_word_keeps_best_field_under_cap():
+    records = [record("vm", f"vm-{i:04d}", f"vm-{i}", annotation="site london") for i in range(500)]
+    records.append(record("datastore", "London", "datastore-1"))   # indexed last
+    hits = TrigramIndex(records).search("london", limit=3)
+
+    assert top(hits) == ("datastore-1", "name", 1.0)
+    assert [h["matched_field"] for h in hits[1:]] == ["annotation", "annotation"]
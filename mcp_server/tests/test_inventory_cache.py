@@ -0,0 +1,45 @@
+from types import SimpleNamespace as NS
+
+import pytest
+
+pytest.importorskip("pyVmomi")
+
+from inventory_cache import InventoryCache  # noqa: E402
+
+
+def nic(*ips):
+    return NS(ipAddress=list(ips))
+
+
+def update(obj, *changes, kind="modify"):
+    return NS(filterSet=[NS(objectSet=[NS(obj=obj, kind=kind, changeSet=[
+        NS(name=name, op=op, val=val) for name, op, val in changes
+    ])])])
+
+
+def test_indexed_path_rereads_base_property(tmp_path):
+    cache = InventoryCache(connect=None, snapshot_path=str(tmp_path / "inv.snap"))
+    vm = NS(_moId="vm-1", guest=NS(net=[nic("10.0.0.5")]))
+    cache._apply(update(vm, ("name", "assign", "web-01"), ("guest.net", "assign", vm.guest.net),
+                        kind="enter"), seen=None)
+    assert cache.records()[0]["props"]["guest.net"] == ["10.0.0.5"]
+
+    # A NIC is added: vCenter reports the element, the object now has both
+    vm.guest.net = [nic("10.0.0.5"), nic("10.0.1.7")]
+    cache._apply(update(vm, ('guest.net["4001"]', "add", nic("10.0.1.7"))), seen=None)
+
+    props = cache.records()[0]["props"]
+    assert props["guest.net"] == ["10.0.0.5", "10.0.1.7"]
+    assert not [k for k in props if "[" in k]
+    assert "10.0.1.7" in cache.search_records()[0]["ips"]
+
+
+def test_indexed_path_on_unset_property_drops_it(tmp_path):
+    cache = InventoryCache(connect=None, snapshot_path=str(tmp_path / "inv.snap"))
+    vm = NS(_moId="vm-1", guest=NS(net=[nic("10.0.0.5")]))
+    cache._apply(update(vm, ("guest.net", "assign", vm.guest.net), kind="enter"), seen=None)
+
+    vm.guest.net = None
+    cache._apply(update(vm, ('guest.net["4000"]', "remove", None)), seen=None)
+
+    assert "guest.net" not in cache.records()[0]["props"]
@@ -0,0 +1,101 @@
+import warnings
+from types import SimpleNamespace as NS
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("pyVmomi")
+
+from pyVmomi import vim  # noqa: E402
+
+from rightsizing import RightsizingReport, _percentile_rows, analyze, fetch_history  # noqa: E402
+
+
+def stats(vcpu, memory_mb, cpu_pct, mem_pct):
+    vcpu, memory_mb = np.array(vcpu, float), np.array(memory_mb, float)
+    return {
+        "refs":        [],
+        "names":       [f"vm-{i}" for i in range(len(vcpu))],
+        "vcpu":        vcpu,
+        "memory_mb":   memory_mb,
+        "cpu_max_mhz": vcpu * 2000,
+        "cpu_mhz":     vcpu * 2000 * np.array(cpu_pct, float) / 100,
+        "mem_used_mb": memory_mb * np.array(mem_pct, float) / 100,
+        "skipped":     0,
+    }
+
+
+@pytest.mark.parametrize("pct", [50, 95, 99])
+def test_percentile_rows_matches_nanpercentile(pct):
+    rng = np.random.default_rng(7)
+    samples = rng.uniform(0, 1, (500, 48)).astype(np.float32)
+    samples[rng.uniform(0, 1, samples.shape) < 0.3] = np.nan
+    samples[3] = np.nan                  # no samples at all
+    samples[4, 1:] = np.nan              # exactly one
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        expected = np.nanpercentile(samples, pct, axis=1)
+    np.testing.assert_allclose(_percentile_rows(samples, pct), expected, rtol=1e-5, equal_nan=True)
+
+
+def test_analyze_classifies_actions():
+    s = stats(
+        vcpu=     [8,   2,   8,   4,   4],
+        memory_mb=[16384, 4096, 4096, 8192, 8192],
+        cpu_pct=  [10,  95,  10,  60,  np.nan],
+        mem_pct=  [20,  80,  95,  75,  50],
+    )
+    r = analyze(s)
+    assert list(r["action"]) == ["downsize", "upsize", "resize", "ok", "no_data"]
+    # 10% of 8 vCPU → 0.8 busy → ceil(0.8 / 0.7) = 2; 20% of 16 GB → 3.2 / 0.8 → 4 GB
+    assert (r["target_vcpu"][0], r["reclaim_vcpu"][0]) == (2, 6)
+    assert (r["target_memory_gb"][0], r["reclaim_gb"][0]) == (4, 12)
+    # 95% of 2 vCPU → ceil(1.9 / 0.7) = 3
+    assert (r["target_vcpu"][1], r["add_vcpu"][1]) == (3, 1)
+    assert r["reclaim_vcpu"][4] == r["add_vcpu"][4] == 0
+
+
+def test_history_replaces_snapshot_where_present():
+    s = stats(vcpu=[4, 4], memory_mb=[8192, 8192], cpu_pct=[90, 90], mem_pct=[50, 50])
+    cpu = np.full((2, 10), np.nan, dtype=np.float32)
+    cpu[0] = 0.1                          # history says idle; row 1 has none
+    mem = np.full((2, 10), 4096, dtype=np.float32)
+    r = analyze(s, cpu, mem)
+    assert r["cpu_pct"][0] == pytest.approx(10) and r["cpu_pct"][1] == pytest.approx(90)
+    assert list(r["samples"]) == [10, 1]
+
+
+def test_report_ranks_and_pages():
+    s = stats(vcpu=[4, 16, 8], memory_mb=[8192] * 3, cpu_pct=[10, 10, 10], mem_pct=[70] * 3)
+    report = RightsizingReport(s, analyze(s), "test")
+    first = report.page(page=1, page_size=2)
+    assert [i["name"] for i in first["items"]] == ["vm-1", "vm-2"]
+    assert (first["pages"], first["total_items"]) == (2, 3)
+    assert report.page(page=9, page_size=2)["items"][0]["name"] == "vm-0"
+    assert report.fleet()["reclaimable_vcpu"] == sum(i["reclaimable_vcpu"] for i in report.page(page_size=10)["items"])
+
+
+def test_fetch_history_batches_and_falls_back_per_batch():
+    refs = [vim.VirtualMachine(f"vm-{i}") for i in range(5)]
+    calls = []
+
+    def query_perf(querySpec):
+        calls.append(len(querySpec))
+        if len(calls) == 2:
+            raise vim.fault.InvalidArgument()       # e.g. over maxQueryMetrics
+        return [NS(entity=spec.entity, value=[
+            NS(id=NS(counterId=1), value=[5000, -1]),     # 50%, then a missing sample
+            NS(id=NS(counterId=2), value=[1024 * 1024]),  # 1 GB active, in KB
+        ]) for spec in querySpec]
+
+    counter = lambda key, group, name: NS(key=key, groupInfo=NS(key=group), nameInfo=NS(key=name),
+                                          rollupType="average")
+    content = NS(perfManager=NS(perfCounter=[counter(1, "cpu", "usage"), counter(2, "mem", "active")],
+                                QueryPerf=query_perf))
+
+    cpu, mem, failed = fetch_history(content, refs, days=1, batch=2)
+
+    assert calls == [2, 2, 1] and failed == 2
+    assert np.nanmax(cpu[0]) == pytest.approx(0.5) and np.count_nonzero(~np.isnan(cpu[0])) == 1
+    assert np.isnan(cpu[2]).all() and np.isnan(cpu[3]).all()      # the failed batch
+    assert np.nanmax(mem[4]) == pytest.approx(1024)
@@ -0,0 +1,65 @@
+import pytest
+
+from snapshot import SnapshotError, SnapshotReader, write_snapshot
+
+RECORDS = [
+    {"type": "vm", "moid": f"vm-{i}", "props": {"name": f"web-{i:02d}", "guest.net": ["10.0.0.1"]}}
+    for i in range(3)
+]
+
+
+@pytest.fixture
+def snap(tmp_path):
+    path = tmp_path / "inventory.snap"
+    write_snapshot(str(path), RECORDS, version="42", created_at=1700000000.0)
+    return path
+
+
+def test_round_trip(snap):
+    with SnapshotReader(str(snap)) as reader:
+        assert (len(reader), reader.version, reader.created_at) == (3, "42", 1700000000.0)
+        assert list(reader) == RECORDS
+
+
+def test_missing_file(tmp_path):
+    with pytest.raises(SnapshotError):
+        SnapshotReader(str(tmp_path / "absent.snap"))
+
+
+@pytest.mark.parametrize("keep", [0, 10, 40])
+def test_truncated_header_or_offsets(snap, keep):
+    snap.write_bytes(snap.read_bytes()[:keep])
+    with pytest.raises(SnapshotError):
+        with SnapshotReader(str(snap)) as reader:
+            list(reader)
+
+
+def test_truncated_records(snap):
+    snap.write_bytes(snap.read_bytes()[:-5])
+    with SnapshotReader(str(snap)) as reader:
+        with pytest.raises(SnapshotError):
+            list(reader)
+
+
+@pytest.mark.parametrize("byte", [b"\xff", b"\"", b"\x00"])
+def test_corrupt_record_byte(snap, byte):
+    data = bytearray(snap.read_bytes())
+    i = data.index(b"web-01")
+    data[i:i + 1] = byte
+    snap.write_bytes(bytes(data))
+    with SnapshotReader(str(snap)) as reader:
+        with pytest.raises(SnapshotError):
+            list(reader)
+
+
+def test_cache_ignores_corrupt_snapshot(snap):
+    pytest.importorskip("pyVmomi")
+    from inventory_cache import InventoryCache
+
+    data = bytearray(snap.read_bytes())
+    data[data.index(b"web-01")] = 0xFF
+    snap.write_bytes(bytes(data))
+
+    cache = InventoryCache(connect=None, snapshot_path=str(snap))
+    cache.load_snapshot()       # must not raise — boot falls back to a live sync
+    assert not cache.loaded and cache.records() == []
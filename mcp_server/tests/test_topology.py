@@ -0,0 +1,80 @@
+import pytest
+
+pytest.importorskip("pyVmomi")
+
+from topology import TopologyGraph  # noqa: E402
+
+
+def node(type_, moid, uses=(), power_state=None):
+    return {"moid": moid, "type": type_, "name": moid.upper(), "power_state": power_state,
+            "uses": list(uses)}
+
+
+def vm(moid, host, networks, datastores, power_state="poweredOn"):
+    uses = [(host, "hard")] + [(n, "soft") for n in networks] + [(d, "soft") for d in datastores]
+    return node("vm", moid, uses, power_state)
+
+
+@pytest.fixture(scope="module")
+def graph():
+    return TopologyGraph([
+        node("cluster", "c1"),
+        node("dvs", "dvs1"),
+        node("portgroup", "pg1", [("dvs1", "hard")]),
+        node("portgroup", "pg2", [("dvs1", "hard")]),
+        node("network", "net1"),
+        node("datastore", "ds1"),
+        node("datastore", "ds2"),
+        node("host", "h1", [("c1", "hard"), ("pg1", "soft"), ("pg2", "soft"), ("ds1", "soft")]),
+        node("host", "h2", [("c1", "hard"), ("net1", "soft"), ("ds1", "soft"), ("ds2", "soft"),
+                            ("folder-9", "hard")]),      # outside the view: dropped
+        vm("vm1", "h1", ["pg1"], ["ds1"]),
+        vm("vm2", "h1", ["pg1", "pg2"], ["ds1"], power_state="poweredOff"),
+        vm("vm3", "h2", ["net1"], ["ds2"]),
+        vm("vm4", "h2", ["net1"], ["ds1", "ds2"]),
+    ])
+
+
+def impacted(result):
+    return {t: sorted(r["moid"] for r in refs) for t, refs in result["impacted"].items()}
+
+
+def degraded(result):
+    return {t: sorted(r["moid"] for r in refs) for t, refs in result["degraded"].items()}
+
+
+def test_host_takes_down_its_vms(graph):
+    result = graph.blast_radius("h1")
+    assert impacted(result) == {"vm": ["vm1", "vm2"]}
+    assert degraded(result) == {}
+    assert result["summary"]["powered_on_vms"] == 1
+
+
+def test_datastore_impacts_its_vms_and_degrades_hosts(graph):
+    result = graph.blast_radius("ds1")
+    assert impacted(result) == {"vm": ["vm1", "vm2", "vm4"]}
+    assert degraded(result) == {"host": ["h1", "h2"]}
+
+
+def test_cluster_failure_cascades_through_hosts(graph):
+    result = graph.blast_radius("c1")
+    assert impacted(result) == {"host": ["h1", "h2"], "vm": ["vm1", "vm2", "vm3", "vm4"]}
+    assert result["summary"]["impacted"] == {"host": 2, "vm": 4}
+    depths = {r["moid"]: r["depth"] for refs in result["impacted"].values() for r in refs}
+    assert depths == {"h1": 1, "h2": 1, "vm1": 2, "vm2": 2, "vm3": 2, "vm4": 2}
+
+
+def test_dvs_failure_counts_vm_reached_by_two_portgroups_once(graph):
+    result = graph.blast_radius("dvs1")
+    assert impacted(result) == {"portgroup": ["pg1", "pg2"], "vm": ["vm1", "vm2"]}
+    assert result["summary"]["impacted"]["vm"] == 2
+    assert degraded(result) == {"host": ["h1"]}     # lost a network, still running
+
+
+def test_dependents_reads_both_directions(graph):
+    result = graph.dependents("h2")
+    assert result["counts"] == {"vm": 2}
+    assert {(r["moid"], r["edge"]) for r in result["depends_on"]} == {
+        ("c1", "hard"), ("net1", "soft"), ("ds1", "soft"), ("ds2", "soft"),
+    }
+    assert graph.resolve("VM3") == ["vm3"] and graph.resolve("vm3", "host") == []
@@ -0,0 +1,220 @@
+"""
+Network and storage topology graph for dependency / blast-radius questions.
+
+One paged PropertyCollector query over a container view pulls, for every
+object, only the references that define the topology:
+
+  VM         network, datastore, runtime.host
+  host       network, datastore, parent (cluster / standalone compute resource)
+  portgroup  config.distributedVirtualSwitch
+  networks, datastores, switches and clusters contribute their names
+
+and TopologyGraph turns them into adjacency indexes in both directions
+("uses" and "used by"). Every edge is either:
+
+  hard  — the dependent cannot run without it: VM → host, host → cluster,
+          portgroup → distributed switch
+  soft  — one of several resources: VM / host → network, portgroup or
+          datastore
+
+get_dependents() reads one adjacency list. get_blast_radius() is a BFS over
+"used by" edges that continues through hard edges only. A VM that loses
+any network or datastore counts as impacted; a host that does is only
+degraded. So a failed datastore impacts the VMs on it without claiming
+every other VM on its hosts, while a failed host, cluster or switch takes
+everything downstream with it.
+"""
+
+import heapq
+import time
+from collections import deque
+
+from pyVmomi import vim, vmodl
+
+# Managed object type → (node type, reference properties)
+TOPOLOGY_PROPERTIES = [
+    (vim.VirtualMachine,                  "vm",        ["name", "runtime.powerState", "runtime.host", "network", "datastore"]),
+    (vim.HostSystem,                      "host",      ["name", "parent", "network", "datastore"]),
+    (vim.Datastore,                       "datastore", ["name"]),
+    (vim.dvs.DistributedVirtualPortgroup, "portgroup", ["name", "config.distributedVirtualSwitch"]),
+    (vim.Network,                         "network",   ["name"]),
+    (vim.DistributedVirtualSwitch,        "dvs",       ["name"]),
+    (vim.ComputeResource,                 "cluster",   ["name"]),   # clusters and standalone hosts
+]
+NODE_TYPES = ("vm", "host", "datastore", "portgroup", "network", "dvs", "cluster")
+
+# property → (edge kind); the property's value is what the object uses
+EDGES = {
+    "runtime.host":                    "hard",
+    "parent":                          "hard",
+    "config.distributedVirtualSwitch": "hard",
+    "network":                         "soft",
+    "datastore":                       "soft",
+}
+
+
+def _node_type(obj) -> str:
+    # Ordered most specific first: a portgroup is also a Network
+    for obj_type, label, _ in TOPOLOGY_PROPERTIES:
+        if isinstance(obj, obj_type):
+            return label
+    return "other"
+
+
+def fetch_topology(content, page_size: int = 1000) -> list[dict]:
+    """
+    Bulk-retrieve topology references: [{"moid", "type", "name", "power_state",
+    "uses": [(moid, kind), ...]}] for every node.
+    """
+    pc    = content.propertyCollector
+    types = list(dict.fromkeys(obj_type for obj_type, _, _ in TOPOLOGY_PROPERTIES))
+    view  = content.viewManager.CreateContainerView(content.rootFolder, types, True)
+    try:
+        traversal = vmodl.query.PropertyCollector.TraversalSpec(
+            name="traverseView", path="view", skip=False, type=vim.view.ContainerView,
+        )
+        spec = vmodl.query.PropertyCollector.FilterSpec(
+            objectSet=[vmodl.query.PropertyCollector.ObjectSpec(obj=view, skip=True, selectSet=[traversal])],
+            propSet=[
+                vmodl.query.PropertyCollector.PropertySpec(type=obj_type, pathSet=paths)
+                for obj_type, _, paths in TOPOLOGY_PROPERTIES
+            ],
+        )
+        options = vmodl.query.PropertyCollector.RetrieveOptions(maxObjects=page_size)
+
+        nodes  = []
+        result = pc.RetrievePropertiesEx([spec], options)
+        while result:
+            for obj in result.objects:
+                props = {p.name: p.val for p in obj.propSet}
+                uses  = []
+                for prop, kind in EDGES.items():
+                    value = props.get(prop)
+                    refs  = value if isinstance(value, list) else [value]   # ManagedObject[] is a list
+                    uses.extend((ref._moId, kind) for ref in refs if isinstance(ref, vmodl.ManagedObject))
+                nodes.append({
+                    "moid":        obj.obj._moId,
+                    "type":        _node_type(obj.obj),
+                    "name":        props.get("name", ""),
+                    "power_state": str(props["runtime.powerState"]) if "runtime.powerState" in props else None,
+                    "uses":        uses,
+                })
+            if not result.token:
+                break
+            result = pc.ContinueRetrievePropertiesEx(result.token)
+        return nodes
+    finally:
+        view.Destroy()
+
+
+class TopologyGraph:
+    """Immutable adjacency indexes over fetch_topology() output."""
+
+    def __init__(self, nodes: list[dict]):
+        self.nodes:   dict[str, dict] = {n["moid"]: n for n in nodes}
+        self.uses:    dict[str, list[tuple[str, str]]] = {}
+        self.used_by: dict[str, list[tuple[str, str]]] = {}
+        self.by_name: dict[str, list[str]] = {}
+        self.type_of: dict[str, str] = {n["moid"]: n["type"] for n in nodes}
+        self.name_of: dict[str, str] = {n["moid"]: n["name"] for n in nodes}
+        self.built_at = time.time()
+
+        for node in nodes:
+            self.by_name.setdefault(node["name"].lower(), []).append(node["moid"])
+            for target, kind in node["uses"]:
+                if target not in self.nodes:
+                    continue   # e.g. a host's parent folder for standalone hosts outside the view
+                self.uses.setdefault(node["moid"], []).append((target, kind))
+                self.used_by.setdefault(target, []).append((node["moid"], kind))
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def edge_count(self) -> int:
+        return sum(len(v) for v in self.uses.values())
+
+    def resolve(self, entity: str, entity_type: str = "") -> list[str]:
+        """moids matching a name (case-insensitive) or a moid, optionally of one type."""
+        if entity in self.nodes:
+            matches = [entity]
+        else:
+            matches = self.by_name.get(entity.lower(), [])
+        if entity_type:
+            matches = [m for m in matches if self.nodes[m]["type"] == entity_type]
+        return matches
+
+    def _ref(self, moid: str) -> dict:
+        node = self.nodes[moid]
+        ref  = {"type": node["type"], "name": node["name"], "moid": moid}
+        if node.get("power_state"):
+            ref["power_state"] = node["power_state"]
+        return ref
+
+    def _group(self, moids, max_items: int, key, extra=None) -> tuple[dict, dict]:
+        """Group moids by node type → (counts, first max_items refs per type by key)."""
+        by_type: dict[str, list[str]] = {}
+        type_of = self.type_of
+        for m in moids:
+            by_type.setdefault(type_of[m], []).append(m)
+        refs = {
+            t: [{**self._ref(m), **(extra(m) if extra else {})} for m in heapq.nsmallest(max_items, ms, key=key)]
+            for t, ms in sorted(by_type.items())
+        }
+        return {t: len(ms) for t, ms in sorted(by_type.items())}, refs
+
+    def dependents(self, moid: str, max_items: int = 200) -> dict:
+        """Direct neighbours: what uses this entity and what it uses."""
+        edges  = dict(self.used_by.get(moid, []))
+        counts, used_by = self._group(edges, max_items, key=self.name_of.__getitem__,
+                                      extra=lambda m: {"edge": edges[m]})
+        depends_on = [{**self._ref(t), "edge": kind} for t, kind in self.uses.get(moid, [])]
+        return {
+            "entity":     self._ref(moid),
+            "counts":     counts,
+            "used_by":    used_by,
+            "depends_on": sorted(depends_on, key=lambda r: (r["type"], r["name"])),
+            "truncated":  any(n > max_items for n in counts.values()),
+        }
+
+    def blast_radius(self, moid: str, max_items: int = 200) -> dict:
+        """
+        Everything that fails (hard dependency chain) or degrades (loses a
+        soft dependency on a failed node) if this entity goes down.
+        """
+        failed   = {moid: 0}
+        degraded: dict[str, int] = {}
+        queue    = deque([moid])
+        type_of  = self.type_of
+        while queue:
+            current = queue.popleft()
+            depth   = failed[current] + 1
+            for source, kind in self.used_by.get(current, ()):
+                if kind == "hard" or type_of[source] == "vm":
+                    # VMs count as failed on losing their host, or any one
+                    # network / datastore — the workload is interrupted
+                    if source not in failed:
+                        failed[source] = depth
+                        degraded.pop(source, None)
+                        if kind == "hard":
+                            queue.append(source)
+                elif source not in failed:
+                    degraded.setdefault(source, depth)
+        del failed[moid]
+
+        impacted_counts, impacted = self._group(
+            failed, max_items,
+            key=lambda m: (failed[m], self.name_of[m]),
+            extra=lambda m: {"depth": failed[m]},
+        )
+        degraded_counts, degraded_refs = self._group(degraded, max_items, key=self.name_of.__getitem__)
+        return {
+            "entity":  self._ref(moid),
+            "summary": {
+                "impacted":       impacted_counts,
+                "degraded":       degraded_counts,
+                "powered_on_vms": sum(1 for m in failed if self.nodes[m].get("power_state") == "poweredOn"),
+            },
+            "impacted":  impacted,
+            "degraded":  degraded_refs,
+            "truncated": any(n > max_items for n in [*impacted_counts.values(), *degraded_counts.values()]),
+        }
@@ -3,13 +3,15 @@
 # Trigger RAG document ingestion inside the running app container.
 #
 # Usage:
-#   ./scripts/ingest_docs.sh
+#   ./scripts/ingest_docs.sh           # incremental — only new/changed files
+#   ./scripts/ingest_docs.sh --full    # re-embed everything
 #
 # Run this:
 #   - On first deploy after dropping runbooks into the runbooks/ directory
 #   - Any time you add, update, or remove runbook files
 #
-# The script re-embeds all documents (content-hash IDs prevent duplicates).
+# Only new or changed files are embedded (tracked in a manifest on the
+# app_data volume). Chunks of edited or deleted files are removed.
 # ─────────────────────────────────────────────────────────────────────────────
 set -euo pipefail
 
@@ -22,7 +24,7 @@ if ! docker ps --format '{{.Names}}' | grep -q "^${CONTAINER}$"; then
 fi
 
 echo "Starting RAG document ingestion..."
-docker exec -it "$CONTAINER" python -m rag.ingest
+docker exec -it "$CONTAINER" python -m rag.ingest "$@"
 
 echo ""
 echo "Ingest complete. New documents are now searchable in the chat."